@@ -15,9 +15,17 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
-    broker_connection_retry_on_startup=True  # Important for robust startup
+    broker_connection_retry_on_startup=True,  # Important for robust startup
+    worker_pool=Config.CELERY_POOL,
+    worker_prefetch_multiplier=1,  # Long-running tasks must not hoard queued jobs
+    broker_pool_limit=Config.CELERY_BROKER_POOL_LIMIT,
+    redis_max_connections=Config.CELERY_REDIS_MAX_CONNECTIONS,  # Shared result-backend pool for AsyncResult lookups
+    redis_socket_keepalive=True
 )
 
+if Config.CELERY_CONCURRENCY:
+    celery_app.conf.worker_concurrency = Config.CELERY_CONCURRENCY
+
 # Configure Celery Beat schedule for periodic tasks
 celery_app.conf.beat_schedule = {
     'cleanup-old-jobs': {
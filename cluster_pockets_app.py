@@ -14,7 +14,6 @@ from config import Config
 from security import handle_file_upload_secure, SecurityError
 from rate_limiter import RateLimitExceeded, check_task_rate_limit
 from logging_config import setup_logging
-import py3Dmol
 import streamlit.components.v1 as components
 from pathlib import Path
 
@@ -25,6 +24,9 @@ RESULTS_DIR = str(Config.RESULTS_DIR)
 # Setup logging
 logger = setup_logging(__name__)
 
+# Read buffer for PDB files; multi-MB frames otherwise take thousands of 8 KiB reads
+PDB_READ_BUFFER = 1 << 20
+
 # Custom CSS for enhanced UI
 st.markdown("""
 <style>
@@ -155,30 +157,40 @@ def update_job_status(job_id, status, step=None, task_id=None, result_info=None)
     with open(status_file, 'w') as f:
         json.dump(current_status, f, indent=4)
 
-def show_molecule_3d(pdb_path, width=800, height=600, style="cartoon"):
-    """Display 3D molecular structure using py3Dmol"""
-    try:
-        with open(pdb_path, 'r') as f:
-            pdb_data = f.read()
+def _read_pdb(path):
+    """Read PDB text; only called from the cached viewer builder, so it is not cached itself"""
+    # latin-1 maps every byte to one code point, so stray non-ASCII bytes survive unchanged
+    with open(path, 'rb', buffering=PDB_READ_BUFFER) as f:
+        return f.read().decode('latin-1')
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _render_view_html(path, mtime, style, width, height):
+    """Build the py3Dmol viewer HTML for a PDB file version and display style"""
+    import py3Dmol  # deferred: only the 3D viewer needs it
 
-        view = py3Dmol.view(width=width, height=height)
-        view.addModel(pdb_data, 'pdb')
+    view = py3Dmol.view(width=width, height=height)
+    view.addModel(_read_pdb(path), 'pdb')
 
-        if style == "cartoon":
-            view.setStyle({'cartoon': {'color': 'spectrum'}})
-        elif style == "surface":
-            view.setStyle({'surface': {'opacity': 0.7, 'color': 'spectrum'}})
-        elif style == "stick":
-            view.setStyle({'stick': {'colorscheme': 'spectrum'}})
+    if style == "cartoon":
+        view.setStyle({'cartoon': {'color': 'spectrum'}})
+    elif style == "surface":
+        view.setStyle({'surface': {'opacity': 0.7, 'color': 'spectrum'}})
+    elif style == "stick":
+        view.setStyle({'stick': {'colorscheme': 'spectrum'}})
 
-        view.zoomTo()
-        view.spin(False)
+    view.zoomTo()
+    view.spin(False)
 
-        html = f"""
+    return f"""
         <div style="border-radius: 15px; overflow: hidden; box-shadow: 0 8px 32px rgba(0,0,0,0.1);">
             {view._make_html()}
         </div>
         """
+
+def show_molecule_3d(pdb_path, width=800, height=600, style="cartoon"):
+    """Display 3D molecular structure using py3Dmol"""
+    try:
+        html = _render_view_html(pdb_path, os.path.getmtime(pdb_path), style, width, height)
         components.html(html, height=height+50, scrolling=False)
     except Exception as e:
         st.error(f"Error loading 3D structure: {e}")
@@ -6,6 +6,8 @@ including paths, limits, and environment-specific settings.
 """
 
 import os
+import secrets
+import time
 from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
@@ -46,6 +48,16 @@ class Config:
     # ========================================
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+    # Worker pool: prefork gives true parallelism for the CPU-heavy pipeline steps;
+    # 'threads' serializes Python work on the GIL. See Celery's worker pool docs.
+    CELERY_POOL = os.getenv('CELERY_POOL', 'prefork')
+    # Worker processes/threads (0 = Celery default, one per CPU core)
+    CELERY_CONCURRENCY = int(os.getenv('CELERY_CONCURRENCY', 0))
+    # Redis connections kept per process for the broker and the result backend.
+    # Streamlit pages look up task states on every rerun, so they reuse pooled
+    # connections instead of opening new ones.
+    CELERY_BROKER_POOL_LIMIT = int(os.getenv('CELERY_BROKER_POOL_LIMIT', 10))
+    CELERY_REDIS_MAX_CONNECTIONS = int(os.getenv('CELERY_REDIS_MAX_CONNECTIONS', 20))
 
     # ========================================
     # File Upload Limits (bytes)
@@ -148,6 +160,23 @@ class Config:
                 f"Expected format: redis://host:port/db"
             )
 
+        # Validate Celery worker pool
+        valid_pools = {'prefork', 'threads', 'eventlet', 'gevent', 'solo'}
+        if cls.CELERY_POOL not in valid_pools:
+            errors.append(
+                f"Invalid CELERY_POOL: {cls.CELERY_POOL}\n"
+                f"Valid options: {', '.join(sorted(valid_pools))}"
+            )
+
+        if cls.CELERY_CONCURRENCY < 0:
+            errors.append(f"CELERY_CONCURRENCY must be non-negative, got: {cls.CELERY_CONCURRENCY}")
+
+        if cls.CELERY_BROKER_POOL_LIMIT < 1:
+            errors.append(f"CELERY_BROKER_POOL_LIMIT must be positive, got: {cls.CELERY_BROKER_POOL_LIMIT}")
+
+        if cls.CELERY_REDIS_MAX_CONNECTIONS < 1:
+            errors.append(f"CELERY_REDIS_MAX_CONNECTIONS must be positive, got: {cls.CELERY_REDIS_MAX_CONNECTIONS}")
+
         # Validate numeric limits
         if cls.MAX_UPLOAD_SIZE <= 0:
             errors.append(f"MAX_UPLOAD_SIZE must be positive, got: {cls.MAX_UPLOAD_SIZE}")
@@ -206,6 +235,27 @@ class Config:
 
         return job_dir / safe_filename
 
+    @staticmethod
+    def generate_job_id(prefix: str) -> str:
+        """
+        Generate a unique job identifier.
+
+        The 8-hex suffix is 32 random bits drawn per ID. Two IDs can only
+        collide if they share a prefix and second, and even then only with
+        probability 2**-32 per pair, whichever process issued them.
+
+        Args:
+            prefix: Pipeline step name (e.g. "detect")
+
+        Returns:
+            Job ID of the form <prefix>_<YYYYmmdd_HHMMSS>_<8 hex chars>
+
+        Example:
+            >>> Config.generate_job_id("detect")
+            'detect_20250815_143022_a1b2c3d4'
+        """
+        return f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(4)}"
+
     @classmethod
     def get_results_path(cls, job_id: str) -> Path:
         """
@@ -253,6 +303,7 @@ class Config:
         print(f"RESULTS_DIR:           {cls.RESULTS_DIR}")
         print(f"POCKETHUNTER_CLI:      {cls.POCKETHUNTER_CLI}")
         print(f"CELERY_BROKER_URL:     {cls.CELERY_BROKER_URL}")
+        print(f"CELERY_POOL:           {cls.CELERY_POOL} (concurrency: {cls.CELERY_CONCURRENCY or 'auto'})")
         print(f"MAX_UPLOAD_SIZE:       {cls.MAX_UPLOAD_SIZE / (1024**2):.1f} MB")
         print(f"MAX_ZIP_SIZE:          {cls.MAX_ZIP_SIZE / (1024**3):.1f} GB")
         print(f"CLEANUP_AFTER_DAYS:    {cls.CLEANUP_AFTER_DAYS} days")
@@ -1,15 +1,18 @@
 import streamlit as st
 import os
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from datetime import datetime
 import time
 import json
-import uuid
 import zipfile
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from tasks import run_detect_pockets_task
-from celery_app import celery_app
+from celery.states import READY_STATES
+from task_events import get_task_state
+from archive_utils import DEFAULT_MAX_WORKERS, add_deflated_members
 from config import Config
 from security import handle_file_upload_secure, SecurityError, FileValidator
 from rate_limiter import RateLimitExceeded, check_task_rate_limit
@@ -23,8 +26,29 @@ RESULTS_DIR = str(Config.RESULTS_DIR)
 # Setup logging
 logger = setup_logging(__name__)
 
-# Custom CSS
-st.markdown("""
+# Confidence tiers by binding probability: [0, 0.4) Low, [0.4, 0.7) Medium, [0.7, 1] High
+_CONF_BINS = [-np.inf, 0.4, 0.7, np.inf]
+_CONF_LABELS = ['🔴 Low', '🟡 Medium', '🟢 High']
+
+# Progress polling backs off exponentially while the task shows no new progress
+POLL_INTERVAL_MIN = 1.0
+POLL_INTERVAL_MAX = 30.0
+POLL_BACKOFF = 1.5
+
+# Large scatter plots switch to WebGL, and beyond the cap are drawn from a fixed random sample
+SCATTER_WEBGL_THRESHOLD = 2000
+SCATTER_MAX_POINTS = 20000
+
+# Result-backend lookups are reused within a rerun and for this many seconds after
+TASK_STATE_TTL = 1.0
+
+# Result-file caches are keyed on (path, mtime); keep this many file versions per loader
+RESULT_CACHE_ENTRIES = 16
+
+@st.cache_resource
+def _static_html():
+    """Page CSS and header, built once per process and emitted in a single markdown call"""
+    return """
 <style>
     .detect-header {
         background: linear-gradient(135deg, #66BB6A 0%, #43A047 50%, #2E7D32 100%);
@@ -96,15 +120,14 @@ st.markdown("""
         border: 1px solid rgba(255, 255, 255, 0.2);
     }
 </style>
-""", unsafe_allow_html=True)
-
-# Header
-st.markdown("""
 <div class="detect-header">
     <h1>🔍 Step 2: Pocket Detection</h1>
     <p style="font-size: 1.2rem; margin-top: 0.5rem;">Identify ligand-binding pockets in protein structures</p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+# Custom CSS and header
+st.markdown(_static_html(), unsafe_allow_html=True)
 
 # Session state initialization
 if 'detect_job_id' not in st.session_state:
@@ -113,28 +136,62 @@ if 'detect_task_id' not in st.session_state:
     st.session_state.detect_task_id = None
 if 'detect_status' not in st.session_state:
     st.session_state.detect_status = 'idle'
+if 'detect_running_job_id' not in st.session_state:
+    st.session_state.detect_running_job_id = None
 if 'cached_job_ids' not in st.session_state:
     st.session_state.cached_job_ids = {}
+if 'detect_poll_interval' not in st.session_state:
+    st.session_state.detect_poll_interval = POLL_INTERVAL_MIN
+if 'detect_poll_marker' not in st.session_state:
+    st.session_state.detect_poll_marker = None
+if 'detect_poll_at' not in st.session_state:
+    st.session_state.detect_poll_at = 0.0
+if 'detect_poll_snap' not in st.session_state:
+    st.session_state.detect_poll_snap = None
 
 # Helper functions
-def extract_zip_to_directory(zip_path, extract_dir):
-    """Extract ZIP file to directory and return list of PDB files"""
+def _extract_members(zip_ref, names, extract_dir):
+    """Stream a subset of ZIP members to disk from a shared, already-parsed archive"""
+    for name in names:
+        with zip_ref.open(name) as src, open(os.path.join(extract_dir, name), 'wb') as dst:
+            shutil.copyfileobj(src, dst, length=1 << 20)
+
+def extract_zip_to_directory(zip_path, extract_dir, max_workers=8):
+    """Extract the PDB members of a ZIP file to directory and return their paths"""
+    # The central directory is parsed once, here; validation and every worker share this handle
     try:
-        FileValidator.validate_zip_file(Path(zip_path))
+        zip_ref = zipfile.ZipFile(zip_path, 'r')
+    except zipfile.BadZipFile:
+        logger.error(f"ZIP validation failed: invalid or corrupted ZIP file {zip_path}")
+        raise SecurityError("Invalid or corrupted ZIP file")
+
+    with zip_ref:
+        try:
+            FileValidator.validate_zip_members(zip_ref)
+        except SecurityError as e:
+            logger.error(f"ZIP validation failed: {e}")
+            raise
+        # Only PDB members are written; anything else in the upload is never touched
+        file_names = [
+            info.filename for info in zip_ref.infolist()
+            if not info.is_dir() and info.filename.lower().endswith('.pdb')
+        ]
         logger.info(f"ZIP file validated: {zip_path}")
-    except SecurityError as e:
-        logger.error(f"ZIP validation failed: {e}")
-        raise
 
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_dir)
+        # Create the directory tree up front so worker threads never race on makedirs
+        for parent in {os.path.dirname(n) for n in file_names}:
+            os.makedirs(os.path.join(extract_dir, parent), exist_ok=True)
+
+        # Member handles from one ZipFile can be read concurrently: only the seek+read of
+        # compressed bytes is serialised on the archive lock, and zlib releases the GIL while
+        # inflating, so member extraction scales across threads.
+        workers = min(max_workers, len(file_names))
+        if workers:
+            chunks = [file_names[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda names: _extract_members(zip_ref, names, extract_dir), chunks))
 
-    pdb_files = []
-    for root, dirs, files in os.walk(extract_dir):
-        for file in files:
-            if file.endswith('.pdb'):
-                pdb_files.append(os.path.join(root, file))
-    return pdb_files
+    return [os.path.join(extract_dir, n) for n in file_names]
 
 def update_job_status(job_id, status, step=None, task_id=None, result_info=None):
     status_file = os.path.join(RESULTS_DIR, f'{job_id}_status.json')
@@ -153,32 +210,283 @@ def update_job_status(job_id, status, step=None, task_id=None, result_info=None)
     if result_info:
         current_status['result_info'] = result_info
     current_status['last_updated'] = datetime.now().isoformat()
-    with open(status_file, 'w') as f:
-        json.dump(current_status, f, indent=4)
 
-# ── Status Banner ──────────────────────────────────────────────────────
-if st.session_state.detect_task_id:
+    # Write to a temp file and rename so readers never see a partially written status
+    fd, tmp_file = tempfile.mkstemp(dir=RESULTS_DIR, prefix=f'{job_id}_status.', suffix='.tmp')
     try:
-        _task = celery_app.AsyncResult(st.session_state.detect_task_id)
-        if _task.state == 'PENDING':
-            st.info("⏳ Task is pending in queue...")
-            st.progress(0)
-        elif _task.state == 'PROGRESS':
-            _prog = (_task.info or {}).get('progress', 0)
-            _step = (_task.info or {}).get('current_step', 'Processing...')
-            st.info(f"🔄 {_step}")
-            st.progress(_prog / 100)
-        elif _task.state == 'SUCCESS':
-            _result = _task.result or {}
-            st.success(f"✅ Detection completed! Pockets detected: {_result.get('pockets_detected', 'N/A')} | Time: {_result.get('processing_time', 0):.1f}s")
-            st.progress(1.0)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(current_status, f)
+        os.replace(tmp_file, status_file)
+    except BaseException:
+        os.unlink(tmp_file)
+        raise
+
+def pdb_archive_is_current(pdbs_dir, zip_path, store_only=False):
+    """True if zip_path is newer than every PDB in pdbs_dir and uses the requested compression"""
+    try:
+        zip_mtime = os.path.getmtime(zip_path)
+        with zipfile.ZipFile(zip_path, 'r') as zipf:
+            infos = zipf.infolist()
+    except (OSError, zipfile.BadZipFile):
+        return False
+    expected = zipfile.ZIP_STORED if store_only else zipfile.ZIP_DEFLATED
+    if infos and infos[0].compress_type != expected:
+        return False
+    newest = max((p.stat().st_mtime for p in Path(pdbs_dir).glob('*.pdb')), default=0)
+    return zip_mtime >= newest
+
+def build_pdb_archive(pdbs_dir, zip_path, store_only=False, max_workers=DEFAULT_MAX_WORKERS):
+    """Build a ZIP of all PDB files in pdbs_dir at zip_path
+
+    Members are DEFLATE-compressed in parallel (zlib releases the GIL) and
+    appended to the archive in sorted order. The archive is written to a
+    temporary file and moved into place, so a reader never sees a partial ZIP.
+    """
+    pdb_files = sorted(Path(pdbs_dir).glob('*.pdb'))
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(zip_path), suffix='.zip.tmp')
+    try:
+        with os.fdopen(fd, 'wb', buffering=1 << 20) as fh:
+            if store_only:
+                with zipfile.ZipFile(fh, 'w', zipfile.ZIP_STORED, allowZip64=True) as zipf:
+                    for pdb_file in pdb_files:
+                        with open(pdb_file, 'rb') as src, zipf.open(pdb_file.name, 'w', force_zip64=True) as dst:
+                            shutil.copyfileobj(src, dst, length=1 << 20)
+            else:
+                with zipfile.ZipFile(fh, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zipf:
+                    add_deflated_members(zipf, ((p, p.name) for p in pdb_files), max_workers=max_workers)
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _probe_dir(path):
+    """List a directory in one scandir pass: {name: is_dir}, empty if missing
+
+    is_dir comes from the d_type scandir already read, so no entry is stat'ed;
+    callers stat only the files whose size or mtime they need.
+    """
+    entries = {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                entries[entry.name] = entry.is_dir()
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return entries
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _load_pockets(path, mtime):
+    """Load pockets.csv and derive num_residues; mtime keys the cache to the file version"""
+    df = pd.read_csv(path)
+
+    # Compute numeric residue count from residue name strings
+    if 'residues' in df.columns and df['residues'].dtype == object:
+        df['num_residues'] = df['residues'].str.split().str.len().fillna(0).astype('int32')
+    elif 'residues' in df.columns:
+        df['num_residues'] = df['residues']
+    else:
+        df['num_residues'] = 0
+    return df
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _display_pockets(path, mtime):
+    """Pockets sorted by probability with the Confidence column precomputed"""
+    df = _load_pockets(path, mtime).sort_values('probability', ascending=False)
+    df['Confidence'] = pd.cut(
+        df['probability'], bins=_CONF_BINS, labels=_CONF_LABELS, right=False
+    ).astype(str)
+    return df
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _display_arrays(path, mtime):
+    """Probability and Confidence columns of the display frame as NumPy arrays for masking"""
+    df = _display_pockets(path, mtime)
+    return df['probability'].to_numpy(dtype=float), df['Confidence'].to_numpy(dtype=object)
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _pocket_summary(path, mtime):
+    """Summary statistics of pocket probabilities for the metric cards"""
+    # Reduce on the raw NumPy array; NaNs are dropped as pandas would
+    prob = _load_pockets(path, mtime)['probability'].to_numpy(dtype=float)
+    count = int(prob.size)
+    prob = prob[~np.isnan(prob)]
+    if prob.size == 0:
+        return {'count': count, 'mean': 0.0, 'median': 0.0, 'std': 0.0, 'max': 0.0, 'high_conf_count': 0}
+    return {
+        'count': count,
+        'mean': float(prob.mean()),
+        'median': float(np.median(prob)),
+        'std': float(prob.std(ddof=1)) if prob.size > 1 else 0.0,
+        'max': float(prob.max()),
+        'high_conf_count': int(np.count_nonzero(prob >= 0.7)),
+    }
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _csv_bytes(path, mtime):
+    """All pockets as CSV bytes for the download button"""
+    return _load_pockets(path, mtime).to_csv(index=False).encode('utf-8')
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _csv_bytes_high_conf(path, mtime):
+    """High-confidence (>=0.7) pockets as CSV bytes for the download button"""
+    df = _load_pockets(path, mtime)
+    return df[df['probability'] >= 0.7].to_csv(index=False).encode('utf-8')
+
+@st.cache_resource(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _build_hist(path, mtime):
+    """Probability histogram for a pockets.csv version, binned server-side"""
+    import plotly.graph_objects as go  # deferred: only the Distribution tab needs plotly
+    prob = _load_pockets(path, mtime)['probability'].to_numpy(dtype=float)
+    counts, edges = np.histogram(prob[~np.isnan(prob)], bins=30, range=(0.0, 1.0))
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=counts,
+        width=edges[1] - edges[0], marker_color='#66BB6A'
+    ))
+    fig.update_layout(
+        title='Probability Distribution',
+        xaxis_title="Binding Probability", yaxis_title="Number of Pockets",
+        bargap=0, showlegend=False
+    )
+    return fig
+
+@st.cache_resource(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _build_box(path, mtime):
+    """Residue count box plot for a pockets.csv version"""
+    import plotly.express as px  # deferred: only the Distribution tab needs plotly
+    fig = px.box(
+        _load_pockets(path, mtime), y='num_residues',
+        title='Residue Count Distribution',
+        color_discrete_sequence=['#43A047']
+    )
+    fig.update_layout(yaxis_title="Number of Residues", showlegend=False)
+    return fig
+
+@st.cache_resource(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _build_scatter(path, mtime):
+    """Probability vs pocket size scatter plot for a pockets.csv version"""
+    import plotly.express as px
+    df = _load_pockets(path, mtime)
+    if len(df) > SCATTER_MAX_POINTS:
+        df = df.sample(n=SCATTER_MAX_POINTS, random_state=0)
+    fig = px.scatter(
+        df, x='num_residues', y='probability',
+        render_mode='webgl' if len(df) > SCATTER_WEBGL_THRESHOLD else 'svg',
+        size='probability', color='probability',
+        title='Pocket Probability vs Size',
+        labels={'num_residues': 'Number of Residues', 'probability': 'Binding Probability'},
+        color_continuous_scale='Greens',
+        hover_data=['File name', 'pocket_index']
+    )
+    fig.update_traces(marker=dict(line=dict(width=1, color='DarkGreen')))
+    return fig
+
+def _detect_task_state(task_id):
+    """Latest (state, info) of the detection task"""
+    return get_task_state(task_id, '_detect_task_snap', ttl=TASK_STATE_TTL)
+
+@st.fragment(run_every=POLL_INTERVAL_MIN)
+def _detect_status_panel(task_id):
+    """Progress of the detection task; polls on its own until the task finishes
+
+    The fragment ticks every POLL_INTERVAL_MIN seconds but queries the task only
+    once detect_poll_interval has elapsed since the last query; ticks in between
+    redraw the last snapshot. Only a finished task reruns the whole page.
+    """
+    now = time.monotonic()
+    snap = st.session_state.detect_poll_snap
+    if snap is None or snap[0] != task_id or now >= st.session_state.detect_poll_at + st.session_state.detect_poll_interval:
+        st.session_state.detect_poll_at = now
+        try:
+            task_state, task_info = _detect_task_state(task_id)
+            poll_marker = (task_state, (task_info or {}).get('progress') if task_state == 'PROGRESS' else None)
+        except Exception as e:
+            logger.error(f"Status poll error: {e}")
+            task_state, task_info = snap[1:] if snap and snap[0] == task_id else ('PENDING', None)
+            poll_marker = st.session_state.detect_poll_marker
+        if poll_marker != st.session_state.detect_poll_marker:
+            st.session_state.detect_poll_marker = poll_marker
+            st.session_state.detect_poll_interval = POLL_INTERVAL_MIN
+        else:
+            st.session_state.detect_poll_interval = min(
+                st.session_state.detect_poll_interval * POLL_BACKOFF, POLL_INTERVAL_MAX
+            )
+        snap = (task_id, task_state, task_info)
+        st.session_state.detect_poll_snap = snap
+    _, task_state, task_info = snap
+
+    if task_state in READY_STATES:
+        # Record the outcome so later reruns show the banner without polling, then rerun the page for results
+        if task_state == 'SUCCESS':
+            result = task_info if isinstance(task_info, dict) else {}
+            message = f"✅ Detection completed! Pockets detected: {result.get('pockets_detected', 'N/A')} | Time: {result.get('processing_time', 0):.1f}s"
             st.session_state.detect_status = 'completed'
-            st.session_state.cached_job_ids['detect'] = st.session_state.detect_job_id
-        elif _task.state == 'FAILURE':
-            st.error(f"❌ Detection failed: {_task.info}")
+            st.session_state.detect_banner = (task_id, 'success', message)
+            st.session_state.cached_job_ids['detect'] = st.session_state.detect_running_job_id
+        else:
+            error = task_info.get('status', task_info) if isinstance(task_info, dict) else task_info
             st.session_state.detect_status = 'failed'
-    except Exception as e:
-        logger.error(f"Status banner error: {e}")
+            st.session_state.detect_banner = (task_id, 'error', f"❌ Detection failed: {error or task_state}")
+        st.rerun()
+
+    if task_state == 'PROGRESS':
+        progress_info = task_info if isinstance(task_info, dict) else {}
+        st.info(f"🔄 {progress_info.get('current_step', 'Processing...')}")
+        st.progress(progress_info.get('progress', 0) / 100)
+    else:
+        st.info("⏳ Task is pending in queue...")
+        st.progress(0)
+
+@st.fragment
+def _pocket_table(path, mtime):
+    """Filter controls and pocket table; widget changes rerun only this fragment"""
+    df_display = _display_pockets(path, mtime)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        min_prob_filter = st.slider(
+            "Minimum Probability:",
+            0.0, 1.0, 0.0, 0.05,
+            help="Filter pockets by minimum probability"
+        )
+    with col2:
+        confidence_filter = st.multiselect(
+            "Filter by Confidence:",
+            options=['🟢 High', '🟡 Medium', '🔴 Low'],
+            default=['🟢 High', '🟡 Medium', '🔴 Low']
+        )
+
+    # Display frame is pre-sorted and cached; filtering is one NumPy mask and one take
+    prob_arr, conf_arr = _display_arrays(path, mtime)
+    mask = prob_arr >= min_prob_filter
+    if confidence_filter:
+        mask &= np.isin(conf_arr, confidence_filter)
+    df_filtered = df_display.iloc[np.flatnonzero(mask)]
+
+    max_rows = st.number_input(
+        "Max rows to display:",
+        min_value=50, max_value=5000, value=500, step=50,
+        key="detect_max_rows",
+        help="Only the top rows by probability are sent to the browser"
+    )
+    st.dataframe(
+        df_filtered[['File name', 'pocket_index', 'probability', 'num_residues', 'Confidence']].head(max_rows),
+        use_container_width=True,
+        height=400
+    )
+    st.info(f"📊 Showing {min(len(df_filtered), max_rows)} of {len(df_filtered)} matching pockets ({len(df_display)} total)")
+
+# ── Status Banner ──────────────────────────────────────────────────────
+# A terminal outcome is kept in session_state, so finished tasks never go back to the result backend
+_banner = st.session_state.get('detect_banner')
+if _banner and _banner[0] == st.session_state.detect_task_id and st.session_state.detect_status in ('completed', 'failed'):
+    if _banner[1] == 'success':
+        st.success(_banner[2])
+        st.progress(1.0)
+    else:
+        st.error(_banner[2])
+elif st.session_state.detect_task_id:
+    _detect_status_panel(st.session_state.detect_task_id)
 
 # ── Input Configuration ───────────────────────────────────────────────
 st.markdown("### 📁 Input Configuration")
@@ -237,7 +545,7 @@ if st.button("🚀 Start Pocket Detection", type="primary", use_container_width=
 
     if extract_job_id and extract_job_id.strip():
         extract_output_dir = os.path.join(RESULTS_DIR, extract_job_id.strip(), "pdbs")
-        if os.path.exists(extract_output_dir) and os.listdir(extract_output_dir):
+        if _probe_dir(extract_output_dir):
             input_pdb_path = extract_output_dir
             input_source = f"Step 1 results (Job ID: {extract_job_id.strip()})"
         else:
@@ -245,7 +553,7 @@ if st.button("🚀 Start Pocket Detection", type="primary", use_container_width=
             st.stop()
 
     elif pdb_zip:
-        job_id = f"detect_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        job_id = Config.generate_job_id("detect")
         extract_dir = os.path.join(UPLOAD_DIR, job_id, "extracted_pdbs")
         os.makedirs(extract_dir, exist_ok=True)
         try:
@@ -268,7 +576,7 @@ if st.button("🚀 Start Pocket Detection", type="primary", use_container_width=
         st.stop()
 
     if input_pdb_path:
-        job_id = f"detect_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        job_id = Config.generate_job_id("detect")
         st.session_state.detect_job_id = job_id
 
         try:
@@ -279,8 +587,8 @@ if st.button("🚀 Start Pocket Detection", type="primary", use_container_width=
             logger.warning(f"Task rate limit exceeded for job {job_id}: {e}")
             st.stop()
 
-        update_job_status(job_id, 'submitted', 'Initializing pocket detection')
         st.session_state.detect_status = 'running'
+        st.session_state.detect_running_job_id = job_id
 
         with st.spinner("Starting pocket detection..."):
             task = run_detect_pockets_task.delay(
@@ -289,10 +597,17 @@ if st.button("🚀 Start Pocket Detection", type="primary", use_container_width=
                 numthreads=num_threads
             )
             st.session_state.detect_task_id = task.id
+            st.session_state.detect_poll_interval = POLL_INTERVAL_MIN
+            st.session_state.detect_poll_marker = None
+            st.session_state.detect_poll_at = 0.0
+            st.session_state.detect_poll_snap = None
+            # One status write per submission, once the task ID is known
             update_job_status(job_id, 'running', 'Pocket detection started', task_id=task.id)
 
         st.success(f"✅ Detection started! Job ID: `{job_id}`")
         st.info(f"📂 Input: {input_source}")
+        # The banner above rendered before this submission; start polling here for this run
+        _detect_status_panel(task.id)
 
 # ── Results ────────────────────────────────────────────────────────────
 # Determine which job to show results for
@@ -313,23 +628,19 @@ with st.expander("📂 Load previous results"):
             results_job_id = load_job_id
             st.rerun()
 
-if results_job_id:
+# The running job's results cannot exist yet, so polling reruns skip this section;
+# results loaded for any other job still render while it runs
+_results_pending = (st.session_state.detect_status == 'running'
+                    and results_job_id == st.session_state.detect_running_job_id)
+if results_job_id and not _results_pending:
     pockets_output_dir = os.path.join(RESULTS_DIR, results_job_id, "pockets")
     pockets_csv_file = os.path.join(pockets_output_dir, "pockets.csv")
 
-    if os.path.exists(pockets_csv_file):
+    if "pockets.csv" in _probe_dir(pockets_output_dir):
         try:
-            df_pockets = pd.read_csv(pockets_csv_file)
-
-            # Compute numeric residue count from residue name strings
-            if 'residues' in df_pockets.columns and df_pockets['residues'].dtype == object:
-                df_pockets['num_residues'] = df_pockets['residues'].apply(
-                    lambda x: len(str(x).split()) if pd.notna(x) else 0
-                )
-            elif 'residues' in df_pockets.columns:
-                df_pockets['num_residues'] = df_pockets['residues']
-            else:
-                df_pockets['num_residues'] = 0
+            pockets_mtime = os.stat(pockets_csv_file).st_mtime
+            df_pockets = _load_pockets(pockets_csv_file, pockets_mtime)
+            pocket_stats = _pocket_summary(pockets_csv_file, pockets_mtime)
 
             if len(df_pockets) == 0:
                 st.warning("⚠️ Detection completed but no pockets were found in the input structures.")
@@ -343,18 +654,18 @@ if results_job_id:
                     st.markdown(f"""
                     <div class="metric-card">
                         <div class="metric-label">Total Pockets</div>
-                        <div class="metric-value">{len(df_pockets)}</div>
+                        <div class="metric-value">{pocket_stats['count']}</div>
                     </div>
                     """, unsafe_allow_html=True)
                 with col2:
                     st.markdown(f"""
                     <div class="metric-card">
                         <div class="metric-label">Avg Probability</div>
-                        <div class="metric-value">{df_pockets['probability'].mean():.3f}</div>
+                        <div class="metric-value">{pocket_stats['mean']:.3f}</div>
                     </div>
                     """, unsafe_allow_html=True)
                 with col3:
-                    high_conf = len(df_pockets[df_pockets['probability'] >= 0.7])
+                    high_conf = pocket_stats['high_conf_count']
                     st.markdown(f"""
                     <div class="metric-card">
                         <div class="metric-label">High Confidence</div>
@@ -365,7 +676,7 @@ if results_job_id:
                     st.markdown(f"""
                     <div class="metric-card">
                         <div class="metric-label">Best Probability</div>
-                        <div class="metric-value">{df_pockets['probability'].max():.3f}</div>
+                        <div class="metric-value">{pocket_stats['max']:.3f}</div>
                     </div>
                     """, unsafe_allow_html=True)
 
@@ -377,121 +688,71 @@ if results_job_id:
                 ])
 
                 with results_tab1:
-                    df_display = df_pockets.sort_values('probability', ascending=False)
-
-                    def get_confidence_badge(prob):
-                        if prob >= 0.7:
-                            return "🟢 High"
-                        elif prob >= 0.4:
-                            return "🟡 Medium"
-                        else:
-                            return "🔴 Low"
-
-                    df_display['Confidence'] = df_display['probability'].apply(get_confidence_badge)
-
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        min_prob_filter = st.slider(
-                            "Minimum Probability:",
-                            0.0, 1.0, 0.0, 0.05,
-                            help="Filter pockets by minimum probability"
-                        )
-                    with col2:
-                        confidence_filter = st.multiselect(
-                            "Filter by Confidence:",
-                            options=['🟢 High', '🟡 Medium', '🔴 Low'],
-                            default=['🟢 High', '🟡 Medium', '🔴 Low']
-                        )
-
-                    df_filtered = df_display[df_display['probability'] >= min_prob_filter]
-                    if confidence_filter:
-                        df_filtered = df_filtered[df_filtered['Confidence'].isin(confidence_filter)]
-
-                    st.dataframe(
-                        df_filtered[['File name', 'pocket_index', 'probability', 'num_residues', 'Confidence']],
-                        use_container_width=True,
-                        height=400
-                    )
-                    st.info(f"📊 Showing {len(df_filtered)} of {len(df_pockets)} pockets")
+                    _pocket_table(pockets_csv_file, pockets_mtime)
 
                 with results_tab2:
                     col1, col2 = st.columns(2)
                     with col1:
-                        fig_hist = px.histogram(
-                            df_pockets, x='probability',
-                            title='Probability Distribution',
-                            nbins=30, color_discrete_sequence=['#66BB6A']
-                        )
-                        fig_hist.update_layout(xaxis_title="Binding Probability", yaxis_title="Number of Pockets", showlegend=False)
-                        st.plotly_chart(fig_hist, use_container_width=True)
+                        st.plotly_chart(_build_hist(pockets_csv_file, pockets_mtime), use_container_width=True)
                     with col2:
-                        fig_residues = px.box(
-                            df_pockets, y='num_residues',
-                            title='Residue Count Distribution',
-                            color_discrete_sequence=['#43A047']
-                        )
-                        fig_residues.update_layout(yaxis_title="Number of Residues", showlegend=False)
-                        st.plotly_chart(fig_residues, use_container_width=True)
-
-                    fig_scatter = px.scatter(
-                        df_pockets, x='num_residues', y='probability',
-                        size='probability', color='probability',
-                        title='Pocket Probability vs Size',
-                        labels={'num_residues': 'Number of Residues', 'probability': 'Binding Probability'},
-                        color_continuous_scale='Greens',
-                        hover_data=['File name', 'pocket_index']
-                    )
-                    fig_scatter.update_traces(marker=dict(line=dict(width=1, color='DarkGreen')))
-                    st.plotly_chart(fig_scatter, use_container_width=True)
+                        st.plotly_chart(_build_box(pockets_csv_file, pockets_mtime), use_container_width=True)
+
+                    st.plotly_chart(_build_scatter(pockets_csv_file, pockets_mtime), use_container_width=True)
+                    if pocket_stats['count'] > SCATTER_MAX_POINTS:
+                        st.caption(f"Scatter shows a random sample of {SCATTER_MAX_POINTS:,} of {pocket_stats['count']:,} pockets")
 
                     stats_col1, stats_col2, stats_col3, stats_col4 = st.columns(4)
                     with stats_col1:
-                        st.metric("Mean Probability", f"{df_pockets['probability'].mean():.3f}")
+                        st.metric("Mean Probability", f"{pocket_stats['mean']:.3f}")
                     with stats_col2:
-                        st.metric("Median Probability", f"{df_pockets['probability'].median():.3f}")
+                        st.metric("Median Probability", f"{pocket_stats['median']:.3f}")
                     with stats_col3:
-                        st.metric("Std Dev", f"{df_pockets['probability'].std():.3f}")
+                        st.metric("Std Dev", f"{pocket_stats['std']:.3f}")
                     with stats_col4:
-                        st.metric("High Confidence (>=0.7)", len(df_pockets[df_pockets['probability'] >= 0.7]))
+                        st.metric("High Confidence (>=0.7)", pocket_stats['high_conf_count'])
 
                 with results_tab3:
                     col1, col2 = st.columns(2)
                     with col1:
                         st.markdown("**📄 Data Files**")
-                        csv_data = df_pockets.to_csv(index=False)
                         st.download_button(
                             label="📥 Download All Pockets (CSV)",
-                            data=csv_data,
+                            data=_csv_bytes(pockets_csv_file, pockets_mtime),
                             file_name=f"pockets_{results_job_id}.csv",
                             mime="text/csv",
                             use_container_width=True
                         )
-                        df_high_conf = df_pockets[df_pockets['probability'] >= 0.7]
-                        if len(df_high_conf) > 0:
-                            hc_csv = df_high_conf.to_csv(index=False)
+                        if pocket_stats['high_conf_count'] > 0:
                             st.download_button(
                                 label="📥 Download High Confidence (CSV)",
-                                data=hc_csv,
+                                data=_csv_bytes_high_conf(pockets_csv_file, pockets_mtime),
                                 file_name=f"high_confidence_pockets_{results_job_id}.csv",
                                 mime="text/csv",
                                 use_container_width=True
                             )
                     with col2:
                         st.markdown("**📦 Structure Files**")
-                        if st.button("🔄 Generate PDB Archive", use_container_width=True):
-                            with st.spinner("Creating archive..."):
-                                pdbs_dir = os.path.join(RESULTS_DIR, results_job_id, "pdbs")
-                                zip_path = os.path.join(pockets_output_dir, 'pockets_pdbs.zip')
-                                with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                                    for pdb_file in Path(pdbs_dir).glob('*.pdb'):
-                                        zipf.write(pdb_file, pdb_file.name)
-                                st.success("✅ Archive created!")
                         zip_path = os.path.join(pockets_output_dir, 'pockets_pdbs.zip')
+                        fast_archive = st.checkbox(
+                            "Fast archive (no compression)",
+                            value=False,
+                            key="detect_fast_archive",
+                            help="Store PDB files without DEFLATE; larger archive but much faster to build"
+                        )
+                        if st.button("🔄 Generate PDB Archive", use_container_width=True):
+                            pdbs_dir = os.path.join(RESULTS_DIR, results_job_id, "pdbs")
+                            if pdb_archive_is_current(pdbs_dir, zip_path, store_only=fast_archive):
+                                st.success("✅ Archive up-to-date")
+                            else:
+                                with st.spinner("Creating archive..."):
+                                    build_pdb_archive(pdbs_dir, zip_path, store_only=fast_archive)
+                                    st.success("✅ Archive created!")
                         if os.path.exists(zip_path):
-                            with open(zip_path, 'rb') as f:
+                            # The archive lives on disk; download_button reads the whole file into its media store on each render
+                            with open(zip_path, 'rb') as zip_fh:
                                 st.download_button(
                                     label="📥 Download All PDB Files (ZIP)",
-                                    data=f.read(),
+                                    data=zip_fh,
                                     file_name=f"pockets_pdbs_{results_job_id}.zip",
                                     mime="application/zip",
                                     use_container_width=True
@@ -504,20 +765,6 @@ if results_job_id:
             st.error(f"Error loading results: {e}")
             logger.error(f"Results loading error: {e}", exc_info=True)
 
-# Auto-refresh when task is running
-if st.session_state.detect_status == 'running' and st.session_state.detect_task_id:
-    try:
-        task = celery_app.AsyncResult(st.session_state.detect_task_id)
-        if task.ready():
-            st.session_state.detect_status = 'completed'
-            st.rerun()
-        else:
-            time.sleep(3)
-            st.rerun()
-    except Exception:
-        time.sleep(3)
-        st.rerun()
-
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -1,25 +1,26 @@
 import streamlit as st
 import os
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
-import time
+import tempfile
 import json
+import hashlib
 import zipfile
 import shutil
 import uuid
 import glob
 import subprocess
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tasks import run_docking_task
-from celery_app import celery_app
+from task_events import get_task_state
+from archive_utils import add_deflated_members
 from config import Config
-from security import FileValidator, SecurityError
+from security import FileValidator, SecurityError, is_safe_path
 from rate_limiter import RateLimitExceeded, check_task_rate_limit, check_upload_rate_limit
 from logging_config import setup_logging
-from session_state import initialize_session_state, get_pdb_selection_key
-import py3Dmol
+from session_state import initialize_session_state
 import streamlit.components.v1 as components
 
 # Use Config for directories
@@ -29,6 +30,20 @@ UPLOAD_DIR = str(Config.UPLOAD_DIR)
 # Setup logging
 logger = setup_logging(__name__)
 
+# Concurrent OpenBabel conversions for uploaded SDF/PDB ligands
+OBABEL_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# While a docking task is pending or running, its progress panel reruns at this interval (seconds)
+DOCKING_POLL_INTERVAL = 3.0
+
+# Result-backend lookups are reused within a rerun and for this many seconds after
+TASK_STATE_TTL = 2.0
+
+# Result-file caches are keyed on (path, mtime); keep this many file versions per loader
+RESULT_CACHE_ENTRIES = 16
+
+DOCKING_CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'docking.css')
+
 
 def update_job_status(job_id, status, step=None, task_id=None, result_info=None):
     """Update job status file"""
@@ -54,174 +69,45 @@ def update_job_status(job_id, status, step=None, task_id=None, result_info=None)
     with open(status_file, 'w') as f:
         json.dump(current_status, f, indent=4)
 
-# Page configuration is handled by main.py
-
-# Custom CSS for docking page with enhanced styling
-st.markdown("""
-<style>
-    .docking-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 50%, #f093fb 100%);
-        padding: 2rem;
-        border-radius: 20px;
-        margin-bottom: 2rem;
-        color: white;
-        text-align: center;
-        box-shadow: 0 8px 32px rgba(0,0,0,0.1);
-        border: 1px solid rgba(255, 255, 255, 0.18);
-    }
-
-    .docking-header h1 {
-        margin: 0;
-        font-size: 2.5rem;
-        font-weight: 700;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-    }
-
-    .docking-card {
-        background: rgba(255, 255, 255, 0.95);
-        backdrop-filter: blur(10px);
-        padding: 2rem;
-        border-radius: 15px;
-        box-shadow: 0 8px 32px rgba(31, 38, 135, 0.15);
-        border: 1px solid rgba(255, 255, 255, 0.18);
-        margin: 1.5rem 0;
-        transition: all 0.3s ease;
-    }
-
-    .docking-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 12px 48px rgba(31, 38, 135, 0.2);
-    }
-
-    .ligand-upload {
-        border: 3px dashed #667eea;
-        border-radius: 20px;
-        padding: 2.5rem;
-        text-align: center;
-        background: linear-gradient(135deg, #f5f7fa 0%, #e8ebf5 100%);
-        margin: 1.5rem 0;
-        transition: all 0.3s ease;
-    }
-
-    .ligand-upload:hover {
-        border-color: #764ba2;
-        background: linear-gradient(135deg, #e8ebf5 0%, #dce1f0 100%);
-        transform: scale(1.01);
-    }
+def _docking_task_state(task_id):
+    """Latest (state, info) of the docking task"""
+    return get_task_state(task_id, '_docking_task_snap', ttl=TASK_STATE_TTL)
 
-    .results-table {
-        background: white;
-        border-radius: 15px;
-        overflow: hidden;
-        box-shadow: 0 4px 20px rgba(0,0,0,0.08);
-    }
+@st.cache_data(show_spinner=False)
+def _load_reps(path, mtime):
+    """Load cluster_representatives.csv; mtime keys the cache to the file version"""
+    return pd.read_csv(path)
 
-    .affinity-badge {
-        display: inline-block;
-        padding: 0.4rem 1rem;
-        border-radius: 25px;
-        font-size: 0.85rem;
-        font-weight: 600;
-        text-align: center;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-    }
+@st.cache_data(show_spinner=False)
+def _sorted_reps(path, mtime):
+    """Representatives sorted by descending probability"""
+    return _load_reps(path, mtime).sort_values('probability', ascending=False)
 
-    .affinity-excellent {
-        background: linear-gradient(135deg, #00b894 0%, #00a085 100%);
-        color: white;
-    }
+def _quick_select(selection, index):
+    """Quick-selection callback: rebuild the PDB editor starting from the given representatives"""
+    # The editor is re-keyed per version; drop the old key so its edit state doesn't pile up
+    st.session_state.pop(f"docking_pdb_editor_{selection['version']}", None)
+    selection['initial'] = set(index)
+    selection['version'] += 1
 
-    .affinity-good {
-        background: linear-gradient(135deg, #55efc4 0%, #00b894 100%);
-        color: white;
-    }
-
-    .affinity-moderate {
-        background: linear-gradient(135deg, #fdcb6e 0%, #e17055 100%);
-        color: white;
-    }
-
-    .affinity-poor {
-        background: linear-gradient(135deg, #ff7675 0%, #d63031 100%);
-        color: white;
-    }
-
-    .job-id-display {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 1.2rem;
-        border-radius: 15px;
-        font-family: 'Courier New', monospace;
-        font-size: 1.1rem;
-        text-align: center;
-        margin: 1.5rem 0;
-        box-shadow: 0 4px 20px rgba(102, 126, 234, 0.3);
-        border: 1px solid rgba(255, 255, 255, 0.2);
-    }
-
-    .metric-card {
-        background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        text-align: center;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        transition: all 0.3s ease;
-    }
-
-    .metric-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 8px 25px rgba(0,0,0,0.15);
-    }
-
-    .metric-value {
-        font-size: 2rem;
-        font-weight: 700;
-        color: #667eea;
-        margin: 0.5rem 0;
-    }
-
-    .metric-label {
-        font-size: 0.9rem;
-        color: #666;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-
-    /* Tabs styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-    }
-
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        background-color: #f5f7fa;
-        border-radius: 10px;
-        padding: 0 24px;
-        font-weight: 600;
-    }
-
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-    }
-
-    /* 3D viewer container */
-    .viewer-container {
-        border-radius: 15px;
-        overflow: hidden;
-        box-shadow: 0 8px 32px rgba(0,0,0,0.1);
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Page configuration is handled by main.py
 
-# Header
-st.markdown("""
+@st.cache_resource
+def _static_html():
+    """Page CSS (from assets/docking.css) and header, built once per process and emitted in a single markdown call"""
+    with open(DOCKING_CSS_PATH, encoding='utf-8') as fh:
+        css = fh.read()
+    return f"""
+<style>
+{css}</style>
 <div class="docking-header">
     <h1>🔬 Molecular Docking Suite</h1>
     <p style="font-size: 1.2rem; margin-top: 0.5rem;">Advanced ligand-protein docking with 3D visualization and analysis</p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+# Custom CSS and header
+st.markdown(_static_html(), unsafe_allow_html=True)
 
 # Initialize session state using centralized module
 initialize_session_state()
@@ -234,7 +120,7 @@ if 'docking_task_id' not in st.session_state:
 if 'view_mode' not in st.session_state:
     st.session_state.view_mode = 'setup'
 if 'docking_selected_pdbs' not in st.session_state:
-    st.session_state.docking_selected_pdbs = {}
+    st.session_state.docking_selected_pdbs = []
 
 # Sidebar for configuration
 with st.sidebar:
@@ -324,6 +210,14 @@ with st.sidebar:
         help="Opacity of molecular surface"
     )
 
+def _strip_hydrogens(pdb_data):
+    """Drop ATOM/HETATM records whose element column is H, leaving the rest of the PDB untouched"""
+    return "\n".join(
+        line for line in pdb_data.splitlines()
+        if not (line.startswith(('ATOM', 'HETATM')) and line[76:78].strip() == 'H')
+    )
+
+
 def _get_binding_site_residues(pdb_data, sdf_data, distance=5.0):
     """Find protein residue numbers within distance of ligand atoms."""
     import math
@@ -435,11 +329,19 @@ def show_molecule_3d(pdb_data, sdf_data=None, width=800, height=600, style_prote
         color_scheme: Color scheme for protein visualization
         surface_opacity: Opacity for surface style
     """
+    html = _viewer_html(pdb_data, sdf_data, width, height, style_protein, style_ligand, color_scheme, surface_opacity)
+    components.html(html, height=height+50, scrolling=False)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _viewer_html(pdb_data, sdf_data, width, height, style_protein, style_ligand, color_scheme, surface_opacity):
+    """Viewer HTML with control buttons, cached per structure and styling"""
+    import py3Dmol  # deferred: only pages that show a structure need the viewer
     view = py3Dmol.view(width=width, height=height)
 
     # Add both models first so selectors like 'within' can reference either
     if pdb_data:
-        view.addModel(pdb_data, 'pdb')
+        # Hydrogens add vertices without changing the cartoon/surface; ligand keeps its own
+        view.addModel(_strip_hydrogens(pdb_data), 'pdb')
     if sdf_data:
         view.addModel(sdf_data, 'sdf')
 
@@ -534,7 +436,7 @@ def show_molecule_3d(pdb_data, sdf_data=None, width=800, height=600, style_prote
         {buttons_html}
     </div>
     """
-    components.html(html, height=height+50, scrolling=False)
+    return html
 
 def extract_sdf_model(sdf_path, mode):
     """
@@ -582,6 +484,88 @@ def extract_sdf_model(sdf_path, mode):
         return None
 
 
+def _save_upload(uploaded_file, path):
+    """Write a Streamlit upload to path in 1 MiB chunks"""
+    uploaded_file.seek(0)
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(uploaded_file, f, length=1 << 20)
+
+
+def _extract_pdbqt_members(zip_path, dest_dir):
+    """Validate a ZIP and stream its .pdbqt members into dest_dir, returning their paths"""
+    pdbqt_files = []
+    try:
+        zip_ref = zipfile.ZipFile(zip_path, 'r')
+    except zipfile.BadZipFile:
+        raise SecurityError("Invalid or corrupted ZIP file")
+    # Validation and extraction share one parse of the central directory
+    with zip_ref:
+        FileValidator.validate_zip_members(zip_ref)
+        for info in zip_ref.infolist():
+            if info.is_dir() or not info.filename.endswith('.pdbqt'):
+                continue
+            target = os.path.join(dest_dir, info.filename)
+            if not is_safe_path(Path(dest_dir), Path(target)):
+                raise SecurityError(f"ZIP contains path traversal attempt: {info.filename}")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with zip_ref.open(info) as src, open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst, length=1 << 20)
+            pdbqt_files.append(target)
+    return pdbqt_files
+
+
+def build_results_archive(docking_dir, zip_path):
+    """Bundle docking outputs (CSV, SDF, PDBQT, logs) into a ZIP on disk, replacing zip_path atomically"""
+    members = []
+    for root, dirs, files in os.walk(docking_dir):
+        for file in files:
+            if file.endswith(('.csv', '.sdf', '.pdbqt', '.log')):
+                file_path = os.path.join(root, file)
+                members.append((file_path, os.path.relpath(file_path, docking_dir)))
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(zip_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb', buffering=1 << 20) as fh, \
+                zipfile.ZipFile(fh, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zipf:
+            # Members are compressed on a thread pool and appended in walk order
+            add_deflated_members(zipf, members)
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_selected_reps(selected_reps):
+    """
+    Persist the selected representatives for the docking task and return the file path.
+
+    Files are named by a hash of their contents, so re-submitting the same
+    selection reuses the existing file instead of writing it again.
+    """
+    selected_reps = selected_reps.reset_index(drop=True)
+    digest = hashlib.sha1(pd.util.hash_pandas_object(selected_reps, index=False).to_numpy().tobytes()).hexdigest()[:16]
+    path = os.path.join(UPLOAD_DIR, f"filtered_reps_{digest}.feather")
+    if not os.path.exists(path):
+        fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix='.tmp')
+        os.close(fd)
+        try:
+            selected_reps.to_feather(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return path
+
+
+def _convert_to_pdbqt(src_path):
+    """Convert an SDF/PDB ligand to PDBQT with OpenBabel, remove the source and return the PDBQT path"""
+    pdbqt_path = src_path.rsplit('.', 1)[0] + '.pdbqt'
+    subprocess.run([
+        'obabel', src_path, '-O', pdbqt_path, '--gen3d'
+    ], check=True, capture_output=True, text=True)
+    os.remove(src_path)
+    return pdbqt_path
+
+
 # Function to classify affinity
 def classify_affinity(affinity):
     """Classify binding affinity into categories"""
@@ -594,6 +578,184 @@ def classify_affinity(affinity):
     else:
         return "poor", "🔴"
 
+# Upper bounds (exclusive) of the excellent/good/moderate classes; codes index AFFINITY_CLASSES
+AFFINITY_THRESHOLDS = np.array([-10.0, -8.0, -6.0])
+AFFINITY_CLASSES = ('excellent', 'good', 'moderate', 'poor')
+_AFFINITY_CLASS_ARRAY = np.array(AFFINITY_CLASSES)
+_AFFINITY_EMOJI_ARRAY = np.array(["🟢", "🟡", "🟠", "🔴"])
+
+def affinity_codes(affinities):
+    """Class code (index into AFFINITY_CLASSES) per affinity, matching classify_affinity"""
+    # side='right' keeps the boundaries exclusive; NaN sorts past every threshold (poor)
+    return np.searchsorted(AFFINITY_THRESHOLDS, affinities, side='right').astype(np.uint8)
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _load_docking_results(path, mtime):
+    """
+    Load docking results and the best pose per ligand-receptor pair.
+
+    path is the results CSV; a Parquet sidecar written alongside it is
+    preferred when present and not older. mtime keys the cache to the file
+    version. ligand/receptor are read as categoricals so the best-pose
+    deduplication works on integer codes, and df_best carries a uint8
+    affinity_code (index into AFFINITY_CLASSES) for filtering. df_best is
+    None when the file is empty or lacks the ligand/receptor columns.
+    """
+    parquet_path = os.path.splitext(path)[0] + '.parquet'
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= mtime:
+        df_results = pd.read_parquet(parquet_path)
+        df_results = df_results.astype({c: 'category' for c in ('ligand', 'receptor') if c in df_results.columns})
+    else:
+        df_results = pd.read_csv(path, engine='pyarrow', dtype={'ligand': 'category', 'receptor': 'category'})
+    if df_results.empty or 'ligand' not in df_results.columns or 'receptor' not in df_results.columns:
+        return df_results, None
+    # Stable sort keeps the first-listed pose among equal affinities
+    df_best = (
+        df_results.sort_values('affinity (kcal/mol)', kind='mergesort')
+        .drop_duplicates(subset=['ligand', 'receptor'], keep='first')
+    )
+    codes = affinity_codes(df_best['affinity (kcal/mol)'].to_numpy(dtype=float, na_value=np.nan))
+    df_best['affinity_class'] = _AFFINITY_CLASS_ARRAY[codes]
+    df_best['affinity_emoji'] = _AFFINITY_EMOJI_ARRAY[codes]
+    df_best['affinity_code'] = codes
+    return df_results, df_best
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _csv_bytes(path, mtime):
+    """All docking poses as CSV bytes for the download button"""
+    df_results, _ = _load_docking_results(path, mtime)
+    return df_results.to_csv(index=False).encode('utf-8')
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _csv_bytes_best(path, mtime):
+    """Best pose per ligand-receptor pair as CSV bytes for the download button"""
+    _, df_best = _load_docking_results(path, mtime)
+    return df_best.to_csv(index=False).encode('utf-8')
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _affinity_stats(path, mtime):
+    """Mean, median, std and best affinity over all poses for the statistics row"""
+    # Reduce on the raw NumPy array; NaNs are dropped as pandas would
+    df_results, _ = _load_docking_results(path, mtime)
+    aff = df_results['affinity (kcal/mol)'].to_numpy(dtype=float, na_value=np.nan)
+    aff = aff[~np.isnan(aff)]
+    if aff.size == 0:
+        return {'mean': np.nan, 'median': np.nan, 'std': np.nan, 'min': np.nan}
+    return {
+        'mean': float(aff.mean()),
+        'median': float(np.median(aff)),
+        'std': float(aff.std(ddof=1)) if aff.size > 1 else np.nan,
+        'min': float(aff.min()),
+    }
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _results_overview(path, mtime):
+    """Metric card values for a docking results file version"""
+    df_results, _ = _load_docking_results(path, mtime)
+    best_aff = float(df_results['affinity (kcal/mol)'].min())
+    return {
+        'total_docking_poses': len(df_results),
+        'unique_ligands': df_results['ligand'].nunique(),
+        'unique_receptors': df_results['receptor'].nunique(),
+        'best_affinity': best_aff,
+        'best_emoji': classify_affinity(best_aff)[1],
+    }
+
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _ranked_best(path, mtime, classes):
+    """Best poses in the given affinity classes (all when empty), strongest binders first"""
+    _, df_best = _load_docking_results(path, mtime)
+    if classes:
+        mask_bits = sum(1 << AFFINITY_CLASSES.index(c) for c in set(classes))
+        codes = df_best['affinity_code'].to_numpy()
+        df_best = df_best[(np.left_shift(1, codes) & mask_bits) != 0]
+    return df_best.sort_values('affinity (kcal/mol)')
+
+@st.cache_resource(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _affinity_hist(path, mtime):
+    """Affinity histogram for a docking results file version, binned server-side"""
+    import plotly.graph_objects as go  # deferred: only the results analysis needs plotly
+    df_results, _ = _load_docking_results(path, mtime)
+    affs = df_results['affinity (kcal/mol)'].to_numpy(dtype=np.float32, na_value=np.nan)
+    counts, edges = np.histogram(affs[~np.isnan(affs)], bins=30)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=counts,
+        width=edges[1] - edges[0], marker_color='#667eea'
+    ))
+    fig.update_layout(
+        title='Affinity Distribution',
+        xaxis_title="Affinity (kcal/mol)", yaxis_title="Count",
+        bargap=0, showlegend=False, height=300
+    )
+    return fig
+
+@st.fragment(run_every=DOCKING_POLL_INTERVAL)
+def _docking_progress_panel(task_id):
+    """Progress of a queued or running docking task; polls on its own until the task finishes"""
+    task_state, task_info = _docking_task_state(task_id)
+    if task_state not in ('PENDING', 'PROGRESS'):
+        # Finished: rerun the whole page so the results section renders
+        st.rerun()
+
+    st.markdown("### 📈 Job Progress")
+    if task_state == 'PENDING':
+        st.info("⏳ Task is pending in queue...")
+    elif isinstance(task_info, dict):
+        progress = task_info.get('progress', 0)
+        current_step = task_info.get('current_step', 'Processing...')
+        status = task_info.get('status', 'Running...')
+
+        st.progress(progress / 100)
+        st.info(f"🔄 {current_step}")
+        st.write(f"**Status:** {status}")
+        if progress >= 100:
+            st.success("✅ Docking completed!")
+    else:
+        st.warning("⚠️ Progress data format unexpected")
+
+@st.cache_resource(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _affinity_box(path, mtime):
+    """Box plot of the first five poses per ligand for a docking results file version"""
+    import plotly.express as px  # deferred: only the results analysis needs plotly
+    df_results, _ = _load_docking_results(path, mtime)
+    fig = px.box(
+        df_results.groupby('ligand', observed=True).head(5),
+        x='ligand',
+        y='affinity (kcal/mol)',
+        title='Affinity by Ligand',
+        color_discrete_sequence=['#764ba2']
+    )
+    fig.update_layout(xaxis_title="Ligand", yaxis_title="Affinity", showlegend=False, height=300)
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+@st.cache_resource(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _affinity_heatmap(path, mtime):
+    """Ligand x receptor best-affinity heatmap for a docking results file version"""
+    import plotly.graph_objects as go  # deferred: only the results analysis needs plotly
+    _, df_best = _load_docking_results(path, mtime)
+    # ligand/receptor are categorical, so the groupby works on codes; unstack skips pivot_table's overhead
+    pivot_data = (
+        df_best.groupby(['ligand', 'receptor'], observed=True)['affinity (kcal/mol)']
+        .min()
+        .unstack('receptor')
+    )
+    fig = go.Figure(data=go.Heatmap(
+        z=pivot_data.values,
+        x=pivot_data.columns,
+        y=pivot_data.index,
+        colorscale='RdYlGn_r',
+        text=pivot_data.values,
+        texttemplate='%{text:.1f}',
+        textfont={"size": 9},
+        colorbar=dict(title="kcal/mol")
+    ))
+    fig.update_layout(
+        title='Ligand-Receptor Affinity Matrix',
+        height=max(350, len(pivot_data.index) * 25)
+    )
+    return fig
+
 # Main content area - Create tabs for different views
 tab_setup, tab_results = st.tabs(["🎯 Setup & Launch", "📊 Results & 3D Viewer"])
 
@@ -645,98 +807,73 @@ with tab_setup:
             st.success(f"✅ Found cluster job: {cluster_job_id}")
 
             try:
-                df_reps = pd.read_csv(representatives_file)
+                reps_mtime = os.path.getmtime(representatives_file)
+                df_reps = _load_reps(representatives_file, reps_mtime)
                 st.info(f"📊 Cluster has {len(df_reps)} representative pockets")
 
                 # PDB file selection
                 st.markdown("### 🎯 Select PDB Files for Docking")
                 st.markdown("Choose which PDB files from the cluster you want to include in the docking simulation:")
 
-                # Create checkboxes for each PDB file
-                selected_pdbs = []
+                df_reps_sorted = _sorted_reps(representatives_file, reps_mtime)
 
-                # Group by probability for better organization
-                df_reps_sorted = df_reps.sort_values('probability', ascending=False)
+                # Selection state: the editor's starting selection plus a version that
+                # quick-selection buttons bump to rebuild the editor from a new start
+                selection = st.session_state.get('docking_pdb_selection')
+                if not selection or selection['source'] != representatives_file:
+                    mid = (len(df_reps_sorted) + 1) // 2
+                    selection = {
+                        'source': representatives_file,
+                        'initial': set(df_reps_sorted.index[:mid]),  # top 50% by probability
+                        'version': 0,
+                    }
+                    st.session_state.docking_pdb_selection = selection
 
                 # Quick selection buttons
                 st.markdown("#### ⚡ Quick Selection")
                 col1, col2, col3 = st.columns(3)
 
+                # Callbacks run before the rerun the click triggers, so no extra st.rerun()
                 with col1:
-                    if st.button("Select All", use_container_width=True):
-                        for idx, row in df_reps_sorted.iterrows():
-                            key = get_pdb_selection_key(row['File name'], idx)
-                            st.session_state[key] = True
-                        st.rerun()
+                    st.button("Select All", use_container_width=True,
+                              on_click=_quick_select, args=(selection, df_reps_sorted.index))
 
                 with col2:
-                    if st.button("Select Top 10", use_container_width=True):
-                        for i, (idx, row) in enumerate(df_reps_sorted.iterrows()):
-                            key = get_pdb_selection_key(row['File name'], idx)
-                            st.session_state[key] = i < 10
-                        st.rerun()
+                    st.button("Select Top 10", use_container_width=True,
+                              on_click=_quick_select, args=(selection, df_reps_sorted.index[:10]))
 
                 with col3:
-                    if st.button("Clear All", use_container_width=True):
-                        for idx, row in df_reps_sorted.iterrows():
-                            key = get_pdb_selection_key(row['File name'], idx)
-                            st.session_state[key] = False
-                        st.rerun()
-
-                # Create columns for better layout
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.markdown("#### 🏆 High Probability Pockets (Top 50%)")
-                    mid = (len(df_reps_sorted) + 1) // 2
-                    high_prob_pdbs = df_reps_sorted.iloc[:mid]
-                    for idx, row in high_prob_pdbs.iterrows():
-                        # Use filename + row index key to avoid collisions with duplicate filenames
-                        key = get_pdb_selection_key(row['File name'], idx)
-                        # Initialize session state if not exists
-                        if key not in st.session_state:
-                            st.session_state[key] = True  # Default to selected for high probability
-
-                        is_selected = st.checkbox(
-                            f"{row['File name']} (Prob: {row['probability']:.3f})",
-                            value=st.session_state[key],
-                            key=f"{key}_checkbox"
-                        )
-                        st.session_state[key] = is_selected
-                        if is_selected:
-                            selected_pdbs.append(row)
-
-                with col2:
-                    st.markdown("#### 📊 Lower Probability Pockets")
-                    low_prob_pdbs = df_reps_sorted.iloc[mid:]
-                    for idx, row in low_prob_pdbs.iterrows():
-                        # Use filename + row index key to avoid collisions with duplicate filenames
-                        key = get_pdb_selection_key(row['File name'], idx)
-                        # Initialize session state if not exists
-                        if key not in st.session_state:
-                            st.session_state[key] = False  # Default to not selected for low probability
-
-                        is_selected = st.checkbox(
-                            f"{row['File name']} (Prob: {row['probability']:.3f})",
-                            value=st.session_state[key],
-                            key=f"{key}_checkbox"
-                        )
-                        st.session_state[key] = is_selected
-                        if is_selected:
-                            selected_pdbs.append(row)
+                    st.button("Clear All", use_container_width=True,
+                              on_click=_quick_select, args=(selection, ()))
+
+                # One editable grid instead of a checkbox widget per representative
+                editor_df = df_reps_sorted[['File name', 'residues', 'probability']].copy()
+                editor_df.insert(0, 'Select', editor_df.index.isin(selection['initial']))
+                edited = st.data_editor(
+                    editor_df,
+                    disabled=['File name', 'residues', 'probability'],
+                    column_config={
+                        'Select': st.column_config.CheckboxColumn("Select"),
+                        'probability': st.column_config.NumberColumn("Probability", format="%.3f"),
+                    },
+                    hide_index=True,
+                    use_container_width=True,
+                    height=400,
+                    key=f"docking_pdb_editor_{selection['version']}"
+                )
+                selected_pdbs = df_reps_sorted[edited['Select'].to_numpy()]
 
-                # Store selected PDFs in session state for use when launching docking
+                # Store the selected rows in session state for use when launching docking
                 st.session_state.docking_selected_pdbs = selected_pdbs
 
                 # Show selected count
-                if selected_pdbs:
+                if len(selected_pdbs):
                     st.success(f"✅ Selected {len(selected_pdbs)} PDB files for docking")
 
                     # Show selected files in expandable section
                     with st.expander(f"📋 View Selected PDB Files ({len(selected_pdbs)})"):
-                        selected_df = pd.DataFrame(selected_pdbs)
                         st.dataframe(
-                            selected_df[['File name', 'residues', 'probability']].sort_values('probability', ascending=False),
+                            selected_pdbs[['File name', 'residues', 'probability']],
                             use_container_width=True
                         )
                 else:
@@ -770,66 +907,61 @@ with tab_setup:
 
         # Process uploaded files
         ligand_files = []
+        to_convert = []
 
         for uploaded_file in uploaded_files:
             if uploaded_file.name.endswith('.zip'):
                 # Save and validate ZIP file before extraction
                 zip_temp_path = Path(ligand_temp_dir) / uploaded_file.name
-                with open(zip_temp_path, 'wb') as f:
-                    f.write(uploaded_file.getbuffer())
+                _save_upload(uploaded_file, zip_temp_path)
 
-                # Validate ZIP for security threats
+                # Validate for security threats and extract only the PDBQT members
                 try:
-                    FileValidator.validate_zip_file(zip_temp_path)
+                    pdbqt_files = _extract_pdbqt_members(zip_temp_path, ligand_temp_dir)
                     logger.info(f"ZIP file validated: {uploaded_file.name}")
                 except SecurityError as e:
                     st.error(f"❌ ZIP file validation failed for {uploaded_file.name}: {e}")
                     logger.error(f"ZIP validation failed: {e}")
                     continue  # Skip this file
-
-                # Safe to extract
-                with zipfile.ZipFile(zip_temp_path, 'r') as zip_ref:
-                    zip_ref.extractall(ligand_temp_dir)
-                    # Find PDBQT files in extracted content
-                    pdbqt_count_before = len(ligand_files)
-                    for root, dirs, files in os.walk(ligand_temp_dir):
-                        for file in files:
-                            if file.endswith('.pdbqt'):
-                                ligand_files.append(os.path.join(root, file))
-
-                    # Validate ZIP contained PDBQT files
-                    pdbqt_found = len(ligand_files) - pdbqt_count_before
-                    if pdbqt_found == 0:
-                        st.warning(f"⚠️ ZIP file '{uploaded_file.name}' contains no PDBQT files. Please ensure your ligands are in PDBQT format.")
-                        logger.warning(f"ZIP {uploaded_file.name} contained no PDBQT files")
+                finally:
+                    # The archive is not needed once its members are on disk
+                    zip_temp_path.unlink(missing_ok=True)
+                ligand_files.extend(pdbqt_files)
+
+                # Validate ZIP contained PDBQT files
+                if not pdbqt_files:
+                    st.warning(f"⚠️ ZIP file '{uploaded_file.name}' contains no PDBQT files. Please ensure your ligands are in PDBQT format.")
+                    logger.warning(f"ZIP {uploaded_file.name} contained no PDBQT files")
             else:
                 # Save individual file
                 file_path = os.path.join(ligand_temp_dir, uploaded_file.name)
-                with open(file_path, 'wb') as f:
-                    f.write(uploaded_file.getbuffer())
+                _save_upload(uploaded_file, file_path)
 
-                # Convert to PDBQT if needed
+                # Queue SDF/PDB files for conversion to PDBQT
                 if uploaded_file.name.endswith(('.sdf', '.pdb')):
-                    try:
-                        # Convert using OpenBabel
-                        pdbqt_path = file_path.rsplit('.', 1)[0] + '.pdbqt'
-                        subprocess.run([
-                            'obabel', file_path, '-O', pdbqt_path, '--gen3d'
-                        ], check=True, capture_output=True, text=True)
-
-                        # Remove original file and use converted PDBQT
-                        os.remove(file_path)
-                        ligand_files.append(pdbqt_path)
-                        st.success(f"✅ Converted {uploaded_file.name} to PDBQT format")
-                    except subprocess.CalledProcessError as e:
-                        st.error(f"❌ Failed to convert {uploaded_file.name}: {e}")
-                        # Keep original file if conversion fails
-                        if uploaded_file.name.endswith('.pdbqt'):
-                            ligand_files.append(file_path)
+                    to_convert.append((uploaded_file.name, file_path))
                 else:
                     # Already PDBQT format
                     ligand_files.append(file_path)
 
+        if to_convert:
+            # --gen3d is CPU-heavy; run one obabel process per file concurrently
+            convert_progress = st.progress(0.0, text="Converting ligands to PDBQT...")
+            with ThreadPoolExecutor(max_workers=min(OBABEL_MAX_WORKERS, len(to_convert))) as executor:
+                futures = {
+                    executor.submit(_convert_to_pdbqt, file_path): name
+                    for name, file_path in to_convert
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    name = futures[future]
+                    try:
+                        ligand_files.append(future.result())
+                        st.success(f"✅ Converted {name} to PDBQT format")
+                    except subprocess.CalledProcessError as e:
+                        st.error(f"❌ Failed to convert {name}: {e}")
+                    convert_progress.progress(done / len(to_convert), text=f"Converted {done}/{len(to_convert)} ligands")
+            convert_progress.empty()
+
         if ligand_files:
             st.success(f"✅ Successfully loaded {len(ligand_files)} ligand files")
 
@@ -873,11 +1005,9 @@ with tab_setup:
 
                 # Get selected PDFs from session state (fixes variable scope bug)
                 selected_pdbs = st.session_state.get('docking_selected_pdbs', [])
-                if selected_pdbs:
+                if len(selected_pdbs):
                     # Create filtered representatives file with only selected PDBs
-                    selected_df = pd.DataFrame(selected_pdbs)
-                    filtered_reps_file = os.path.join(UPLOAD_DIR, f"filtered_reps_{job_id}.csv")
-                    selected_df.to_csv(filtered_reps_file, index=False)
+                    filtered_reps_file = write_selected_reps(selected_pdbs)
 
                     # Determine PDB source directory
                     pdb_source_dir = None
@@ -919,10 +1049,7 @@ with tab_setup:
                     st.info(f"**Job ID:** `{job_id}`")
                     st.info("💡 **Switch to the Results & Analysis tab** to monitor progress!")
                     st.info(f"📊 **Parameters:** {len(selected_pdbs)} PDB files, {len(ligand_files)} ligands, {num_poses} poses, exhaustiveness {exhaustiveness}")
-
-                    # Auto-refresh
-                    time.sleep(2)
-                    st.rerun()
+                    # No rerun needed: the results tab renders below in this run and starts polling
                 else:
                     st.error("❌ Please select at least one PDB file for docking")
 
@@ -949,43 +1076,15 @@ with tab_results:
     # Show progress or results
     if st.session_state.docking_job_id and st.session_state.docking_task_id:
         # Get task status
-        task = celery_app.AsyncResult(st.session_state.docking_task_id)
+        task_state, task_info = _docking_task_state(st.session_state.docking_task_id)
 
-        if task.state == 'PENDING':
-            st.markdown("### 📈 Job Progress")
-            st.info("⏳ Task is pending in queue...")
-            if st.button("🔄 Refresh Status"):
-                st.rerun()
-            time.sleep(3)
-            st.rerun()
-        elif task.state == 'PROGRESS':
-            st.markdown("### 📈 Job Progress")
-            progress_data = task.info
-            if isinstance(progress_data, dict):
-                progress = progress_data.get('progress', 0)
-                current_step = progress_data.get('current_step', 'Processing...')
-                status = progress_data.get('status', 'Running...')
-
-                st.progress(progress / 100)
-                st.info(f"🔄 {current_step}")
-                st.write(f"**Status:** {status}")
-
-                if progress < 100:
-                    if st.button("🔄 Refresh Progress"):
-                        st.rerun()
-                    time.sleep(3)
-                    st.rerun()
-                else:
-                    st.success("✅ Docking completed!")
-            else:
-                st.warning("⚠️ Progress data format unexpected")
-                time.sleep(3)
-                st.rerun()
-        elif task.state == 'SUCCESS':
+        if task_state in ('PENDING', 'PROGRESS'):
+            _docking_progress_panel(st.session_state.docking_task_id)
+        elif task_state == 'SUCCESS':
             st.success("✅ Docking completed successfully!")
 
             # Display results
-            results = task.result
+            results = task_info
             if isinstance(results, dict):
                 # Update job status file to 'completed'
                 update_job_status(
@@ -1015,7 +1114,8 @@ with tab_results:
                 # Load results
                 results_file = results.get('docking_results_file')
                 if results_file and os.path.exists(results_file):
-                    df_results = pd.read_csv(results_file)
+                    results_mtime = os.path.getmtime(results_file)
+                    df_results, df_best = _load_docking_results(results_file, results_mtime)
 
                     # Validate DataFrame has required data
                     if df_results.empty:
@@ -1023,11 +1123,6 @@ with tab_results:
                     elif 'ligand' not in df_results.columns or 'receptor' not in df_results.columns:
                         st.error("❌ Results file is missing required columns (ligand, receptor)")
                     else:
-                        # Filter best poses per ligand-receptor pair
-                        df_best = df_results.loc[df_results.groupby(['ligand', 'receptor'])['affinity (kcal/mol)'].idxmin()]
-                        df_best['affinity_class'] = df_best['affinity (kcal/mol)'].apply(lambda x: classify_affinity(x)[0])
-                        df_best['affinity_emoji'] = df_best['affinity (kcal/mol)'].apply(lambda x: classify_affinity(x)[1])
-
                         st.markdown("---")
 
                         # ========== MAIN SPLIT VIEW: Results Table + 3D Viewer ==========
@@ -1049,11 +1144,7 @@ with tab_results:
                             auto_view = st.checkbox("Auto-view", value=True, help="Automatically show 3D view when selecting a pose")
 
                         # Apply filters
-                        if affinity_filter:
-                            df_filtered = df_best[df_best['affinity_class'].isin(affinity_filter)]
-                        else:
-                            df_filtered = df_best
-                        df_display = df_filtered.sort_values('affinity (kcal/mol)').head(top_n)
+                        df_display = _ranked_best(results_file, results_mtime, tuple(affinity_filter)).head(top_n)
 
                         # Split view: Table on left, 3D viewer on right
                         table_col, viewer_col = st.columns([1, 1])
@@ -1093,7 +1184,7 @@ with tab_results:
                                 pose = st.session_state.selected_pose
 
                                 # Pose info card
-                                category, emoji = classify_affinity(pose.get('affinity (kcal/mol)', 0))
+                                emoji = pose.get('affinity_emoji') or classify_affinity(pose.get('affinity (kcal/mol)', 0))[1]
                                 st.markdown(f"""
                                 <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 1rem; border-radius: 10px; color: white; margin-bottom: 1rem;">
                                     <strong>{emoji} {pose.get('ligand', 'N/A')}</strong> ↔ <strong>{pose.get('receptor', 'N/A')}</strong><br>
@@ -1177,65 +1268,28 @@ with tab_results:
 
                             with col1:
                                 # Histogram
-                                fig_hist = px.histogram(
-                                    df_results,
-                                    x='affinity (kcal/mol)',
-                                    title='Affinity Distribution',
-                                    nbins=30,
-                                    color_discrete_sequence=['#667eea']
-                                )
-                                fig_hist.update_layout(xaxis_title="Affinity (kcal/mol)", yaxis_title="Count", showlegend=False, height=300)
-                                st.plotly_chart(fig_hist, use_container_width=True)
+                                st.plotly_chart(_affinity_hist(results_file, results_mtime), use_container_width=True)
 
                             with col2:
                                 # Box plot by ligand
-                                fig_box = px.box(
-                                    df_results.groupby('ligand').head(5),
-                                    x='ligand',
-                                    y='affinity (kcal/mol)',
-                                    title='Affinity by Ligand',
-                                    color_discrete_sequence=['#764ba2']
-                                )
-                                fig_box.update_layout(xaxis_title="Ligand", yaxis_title="Affinity", showlegend=False, height=300)
-                                fig_box.update_xaxes(tickangle=45)
-                                st.plotly_chart(fig_box, use_container_width=True)
+                                st.plotly_chart(_affinity_box(results_file, results_mtime), use_container_width=True)
 
                             # Statistics row
                             stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
+                            stats = _affinity_stats(results_file, results_mtime)
                             with stat_col1:
-                                st.metric("Mean", f"{df_results['affinity (kcal/mol)'].mean():.2f}")
+                                st.metric("Mean", f"{stats['mean']:.2f}")
                             with stat_col2:
-                                st.metric("Median", f"{df_results['affinity (kcal/mol)'].median():.2f}")
+                                st.metric("Median", f"{stats['median']:.2f}")
                             with stat_col3:
-                                st.metric("Std Dev", f"{df_results['affinity (kcal/mol)'].std():.2f}")
+                                st.metric("Std Dev", f"{stats['std']:.2f}")
                             with stat_col4:
-                                st.metric("Best", f"{df_results['affinity (kcal/mol)'].min():.2f}")
+                                st.metric("Best", f"{stats['min']:.2f}")
 
                         with analysis_tab2:
                             # Heatmap
                             if len(df_best) > 1:
-                                pivot_data = df_best.pivot_table(
-                                    values='affinity (kcal/mol)',
-                                    index='ligand',
-                                    columns='receptor',
-                                    aggfunc='min'
-                                )
-
-                                fig_heat = go.Figure(data=go.Heatmap(
-                                    z=pivot_data.values,
-                                    x=pivot_data.columns,
-                                    y=pivot_data.index,
-                                    colorscale='RdYlGn_r',
-                                    text=pivot_data.values,
-                                    texttemplate='%{text:.1f}',
-                                    textfont={"size": 9},
-                                    colorbar=dict(title="kcal/mol")
-                                ))
-                                fig_heat.update_layout(
-                                    title='Ligand-Receptor Affinity Matrix',
-                                    height=max(350, len(pivot_data.index) * 25)
-                                )
-                                st.plotly_chart(fig_heat, use_container_width=True)
+                                st.plotly_chart(_affinity_heatmap(results_file, results_mtime), use_container_width=True)
                             else:
                                 st.info("Need multiple ligand-receptor pairs for heatmap visualization")
 
@@ -1243,19 +1297,17 @@ with tab_results:
                             dl_col1, dl_col2 = st.columns(2)
 
                             with dl_col1:
-                                csv_data = df_results.to_csv(index=False)
                                 st.download_button(
                                     label="📥 Full Results (CSV)",
-                                    data=csv_data,
+                                    data=_csv_bytes(results_file, results_mtime),
                                     file_name=f"docking_results_{st.session_state.docking_job_id}.csv",
                                     mime="text/csv",
                                     use_container_width=True
                                 )
 
-                                best_csv = df_best.to_csv(index=False)
                                 st.download_button(
                                     label="📥 Best Poses (CSV)",
-                                    data=best_csv,
+                                    data=_csv_bytes_best(results_file, results_mtime),
                                     file_name=f"best_poses_{st.session_state.docking_job_id}.csv",
                                     mime="text/csv",
                                     use_container_width=True
@@ -1264,31 +1316,26 @@ with tab_results:
                             with dl_col2:
                                 docking_dir = results.get('docking_output_dir')
                                 if docking_dir:
+                                    zip_path = os.path.join(docking_dir, 'docking_results.zip')
                                     if st.button("🔄 Generate ZIP Archive", use_container_width=True):
                                         with st.spinner("Creating archive..."):
-                                            zip_path = os.path.join(docking_dir, 'results.zip')
-                                            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                                                for root, dirs, files in os.walk(docking_dir):
-                                                    for file in files:
-                                                        if file.endswith(('.csv', '.sdf', '.pdbqt', '.log')):
-                                                            file_path = os.path.join(root, file)
-                                                            zipf.write(file_path, os.path.relpath(file_path, docking_dir))
+                                            build_results_archive(docking_dir, zip_path)
                                             st.success("✅ Archive created!")
 
-                                    zip_path = os.path.join(docking_dir, 'results.zip')
                                     if os.path.exists(zip_path):
-                                        with open(zip_path, 'rb') as f:
+                                        # The archive lives on disk; download_button reads the whole file into its media store on each render
+                                        with open(zip_path, 'rb') as zip_fh:
                                             st.download_button(
                                                 label="📥 Download ZIP",
-                                                data=f.read(),
+                                                data=zip_fh,
                                                 file_name=f"docking_{st.session_state.docking_job_id}.zip",
                                                 mime="application/zip",
                                                 use_container_width=True
                                             )
 
-        elif task.state == 'FAILURE':
+        elif task_state == 'FAILURE':
             st.error("❌ Docking job failed!")
-            error_msg = task.info.get('exc_message', 'Unknown error') if isinstance(task.info, dict) else str(task.info) if task.info else 'Unknown error'
+            error_msg = task_info.get('exc_message', 'Unknown error') if isinstance(task_info, dict) else str(task_info) if task_info else 'Unknown error'
             st.error(f"Error: {error_msg}")
             st.info("💡 Check the Task Monitor for detailed error logs.")
     elif st.session_state.docking_job_id and not st.session_state.docking_task_id:
@@ -1297,7 +1344,8 @@ with tab_results:
         results_file = os.path.join(docking_output_dir, 'docking_results.csv')
         if os.path.exists(results_file):
             st.success("✅ Loaded docking results from disk")
-            df_results = pd.read_csv(results_file)
+            results_mtime = os.path.getmtime(results_file)
+            df_results, df_best = _load_docking_results(results_file, results_mtime)
 
             if df_results.empty:
                 st.warning("⚠️ Results file is empty. No docking poses were generated.")
@@ -1305,22 +1353,16 @@ with tab_results:
                 st.error("❌ Results file is missing required columns (ligand, receptor)")
             else:
                 # Metrics
+                overview = _results_overview(results_file, results_mtime)
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("Total Poses", len(df_results))
+                    st.metric("Total Poses", overview['total_docking_poses'])
                 with col2:
-                    st.metric("Unique Ligands", df_results['ligand'].nunique())
+                    st.metric("Unique Ligands", overview['unique_ligands'])
                 with col3:
-                    st.metric("Unique Receptors", df_results['receptor'].nunique())
+                    st.metric("Unique Receptors", overview['unique_receptors'])
                 with col4:
-                    best_aff = df_results['affinity (kcal/mol)'].min()
-                    category, emoji = classify_affinity(best_aff)
-                    st.metric(f"Best Affinity {emoji}", f"{best_aff:.2f} kcal/mol")
-
-                # Best poses
-                df_best = df_results.loc[df_results.groupby(['ligand', 'receptor'])['affinity (kcal/mol)'].idxmin()]
-                df_best['affinity_class'] = df_best['affinity (kcal/mol)'].apply(lambda x: classify_affinity(x)[0])
-                df_best['affinity_emoji'] = df_best['affinity (kcal/mol)'].apply(lambda x: classify_affinity(x)[1])
+                    st.metric(f"Best Affinity {overview['best_emoji']}", f"{overview['best_affinity']:.2f} kcal/mol")
 
                 st.markdown("---")
                 st.markdown("### 🎯 Results Explorer with 3D Visualization")
@@ -1340,11 +1382,7 @@ with tab_results:
                     st.markdown("<br>", unsafe_allow_html=True)
                     auto_view = st.checkbox("Auto-view", value=True, key="auto_view_loaded")
 
-                if affinity_filter:
-                    df_filtered = df_best[df_best['affinity_class'].isin(affinity_filter)]
-                else:
-                    df_filtered = df_best
-                df_display = df_filtered.sort_values('affinity (kcal/mol)').head(top_n)
+                df_display = _ranked_best(results_file, results_mtime, tuple(affinity_filter)).head(top_n)
 
                 # Split view
                 table_col, viewer_col = st.columns([1, 1])
@@ -1376,7 +1414,7 @@ with tab_results:
                     st.markdown("#### 🔬 3D Structure Viewer")
                     if 'selected_pose' in st.session_state and st.session_state.selected_pose:
                         pose = st.session_state.selected_pose
-                        category, emoji = classify_affinity(pose.get('affinity (kcal/mol)', 0))
+                        emoji = pose.get('affinity_emoji') or classify_affinity(pose.get('affinity (kcal/mol)', 0))[1]
                         st.markdown(f"""
                         <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 1rem; border-radius: 10px; color: white; margin-bottom: 1rem;">
                             <strong>{emoji} {pose.get('ligand', 'N/A')}</strong> ↔ <strong>{pose.get('receptor', 'N/A')}</strong><br>
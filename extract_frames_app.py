@@ -7,6 +7,8 @@ import json
 import uuid
 from tasks import run_extract_to_pdb_task
 from celery_app import celery_app
+from celery.states import READY_STATES
+from task_events import get_task_state
 from config import Config
 from security import handle_file_upload_secure, SecurityError
 from rate_limiter import RateLimitExceeded, check_task_rate_limit, get_rate_limit_status
@@ -19,6 +21,9 @@ RESULTS_DIR = str(Config.RESULTS_DIR)
 # Setup logging
 logger = setup_logging(__name__)
 
+# Result-backend lookups are reused within a rerun and for this many seconds after
+TASK_STATE_TTL = 1.0
+
 # Session state initialization
 if 'extract_job_id' not in st.session_state:
     st.session_state.extract_job_id = None
@@ -27,6 +32,9 @@ if 'extract_task_id' not in st.session_state:
 if 'extract_status' not in st.session_state:
     st.session_state.extract_status = 'idle'
 
+# Debug panels are opt-in; collapsed expanders still execute their body on every rerun
+st.sidebar.checkbox("Debug mode", key="_show_debug")
+
 # Helper functions
 # Note: Using secure upload handler from security.py instead of local function
 
@@ -267,16 +275,19 @@ if st.session_state.extract_task_id or st.session_state.extract_status == 'compl
     progress_percent = 0
     status = "Running..."
     task_state = "UNKNOWN"
+    task_info = None
     
     # Check if we have a task ID
     if st.session_state.extract_task_id:
         show_progress = True
-        task = celery_app.AsyncResult(st.session_state.extract_task_id)
-        progress_info = task.info or {}
+        # One state/info snapshot per rerun; everything below reads it instead of the backend
+        task_state, task_info = get_task_state(
+            st.session_state.extract_task_id, '_extract_task_snap', ttl=TASK_STATE_TTL
+        )
+        progress_info = task_info if isinstance(task_info, dict) else {}
         current_step = progress_info.get('current_step', 'Processing...')
         progress_percent = progress_info.get('progress', 0)
         status = progress_info.get('status', 'Running...')
-        task_state = task.state
     
     # Check if status is running (fallback)
     elif st.session_state.extract_status == 'running':
@@ -346,12 +357,12 @@ if st.session_state.extract_task_id or st.session_state.extract_status == 'compl
             st.warning("⚠️ Task is taking longer than expected. This might indicate an issue with the input files or system resources.")
         
         # Check if task is actually completed and show results
-        if st.session_state.extract_task_id and task.ready() and task.successful():
+        if st.session_state.extract_task_id and task_state == 'SUCCESS':
             st.session_state.extract_status = 'completed'
             st.session_state.cached_job_ids['extract'] = st.session_state.extract_job_id
 
             # Update job status file to 'completed'
-            result = task.result
+            result = progress_info
             if result:
                 update_job_status(
                     st.session_state.extract_job_id,
@@ -408,29 +419,29 @@ if st.session_state.extract_task_id or st.session_state.extract_status == 'compl
         with col2:
             if st.button("🔍 Check Task Status", key="check_task_status"):
                 if st.session_state.extract_task_id:
-                    task = celery_app.AsyncResult(st.session_state.extract_task_id)
-                    st.write(f"**Current Task State:** {task.state}")
-                    st.write(f"**Task Ready:** {task.ready()}")
-                    if task.ready():
-                        st.write(f"**Task Result:** {task.result}")
+                    st.write(f"**Current Task State:** {task_state}")
+                    st.write(f"**Task Ready:** {task_state in READY_STATES}")
+                    if task_state in READY_STATES:
+                        st.write(f"**Task Result:** {task_info}")
                 else:
                     st.write("**No active task ID**")
                 st.rerun()
         
-        # Show debug info in an expander - always visible
-        with st.expander("🔍 Debug Information"):
-            st.json(progress_info)
-            if st.session_state.extract_task_id:
-                task = celery_app.AsyncResult(st.session_state.extract_task_id)
-                st.write(f"**Task State:** {task.state}")
-                st.write(f"**Task ID:** {st.session_state.extract_task_id}")
-                st.write(f"**Task Ready:** {task.ready()}")
-                if task.ready():
-                    st.write(f"**Task Result:** {task.result}")
-            else:
-                st.write("**No active task ID**")
-                st.write(f"**Session Status:** {st.session_state.extract_status}")
-                st.write(f"**Job ID:** {st.session_state.extract_job_id}")
+        # Show debug info in an expander - only when debug mode is enabled
+        if st.session_state.get('_show_debug', False):
+            with st.expander("🔍 Debug Information"):
+                st.json(progress_info)
+                if st.session_state.extract_task_id:
+                    # Reuse the task snapshot fetched above instead of another backend lookup
+                    st.write(f"**Task State:** {task_state}")
+                    st.write(f"**Task ID:** {st.session_state.extract_task_id}")
+                    st.write(f"**Task Ready:** {task_state in READY_STATES}")
+                    if task_state in READY_STATES:
+                        st.write(f"**Task Result:** {task_info}")
+                else:
+                    st.write("**No active task ID**")
+                    st.write(f"**Session Status:** {st.session_state.extract_status}")
+                    st.write(f"**Job ID:** {st.session_state.extract_job_id}")
 
 # Handle completed tasks that don't have task_id anymore
 elif st.session_state.extract_status == 'completed' and st.session_state.extract_job_id:
@@ -483,45 +494,44 @@ elif st.session_state.extract_status == 'completed' and st.session_state.extract
             st.info("💡 Copy this Job ID to use in Step 2: Detect Pockets")
 
 # Debug section to understand what's happening
-with st.expander("🐛 Debug Session State"):
-    st.write("**Session State Debug Info:**")
-    st.write(f"extract_task_id: {st.session_state.get('extract_task_id', 'None')}")
-    st.write(f"extract_status: {st.session_state.get('extract_status', 'None')}")
-    st.write(f"extract_job_id: {st.session_state.get('extract_job_id', 'None')}")
-    st.write(f"cached_job_ids: {st.session_state.get('cached_job_ids', {})}")
-    
-    # Check if we have any task activity
-    has_task_id = bool(st.session_state.get('extract_task_id'))
-    has_running_status = st.session_state.get('extract_status') == 'running'
-    has_completed_status = st.session_state.get('extract_status') == 'completed'
-    has_job_id = bool(st.session_state.get('extract_job_id'))
-    
-    st.write("**Progress Bar Logic:**")
-    st.write(f"Has task ID: {has_task_id}")
-    st.write(f"Has running status: {has_running_status}")
-    st.write(f"Has completed status: {has_completed_status}")
-    st.write(f"Has job ID: {has_job_id}")
-    
-    # Show what condition would trigger progress bar
-    condition1 = has_task_id
-    condition2 = has_running_status
-    condition3 = has_job_id and has_completed_status
-    
-    st.write("**Progress Bar Conditions:**")
-    st.write(f"Condition 1 (task_id): {condition1}")
-    st.write(f"Condition 2 (running): {condition2}")
-    st.write(f"Condition 3 (completed): {condition3}")
-    st.write(f"Should show progress: {condition1 or condition2 or condition3}")
+if st.session_state.get('_show_debug', False):
+    with st.expander("🐛 Debug Session State"):
+        st.write("**Session State Debug Info:**")
+        st.write(f"extract_task_id: {st.session_state.get('extract_task_id', 'None')}")
+        st.write(f"extract_status: {st.session_state.get('extract_status', 'None')}")
+        st.write(f"extract_job_id: {st.session_state.get('extract_job_id', 'None')}")
+        st.write(f"cached_job_ids: {st.session_state.get('cached_job_ids', {})}")
+        
+        # Check if we have any task activity
+        has_task_id = bool(st.session_state.get('extract_task_id'))
+        has_running_status = st.session_state.get('extract_status') == 'running'
+        has_completed_status = st.session_state.get('extract_status') == 'completed'
+        has_job_id = bool(st.session_state.get('extract_job_id'))
+        
+        st.write("**Progress Bar Logic:**")
+        st.write(f"Has task ID: {has_task_id}")
+        st.write(f"Has running status: {has_running_status}")
+        st.write(f"Has completed status: {has_completed_status}")
+        st.write(f"Has job ID: {has_job_id}")
+        
+        # Show what condition would trigger progress bar
+        condition1 = has_task_id
+        condition2 = has_running_status
+        condition3 = has_job_id and has_completed_status
+        
+        st.write("**Progress Bar Conditions:**")
+        st.write(f"Condition 1 (task_id): {condition1}")
+        st.write(f"Condition 2 (running): {condition2}")
+        st.write(f"Condition 3 (completed): {condition3}")
+        st.write(f"Should show progress: {condition1 or condition2 or condition3}")
 
 # Auto-refresh with completion check - more responsive for quick tasks
 if st.session_state.extract_status == 'running':
     # Check if task is ready to avoid unnecessary refreshes
     if st.session_state.extract_task_id:
         try:
-            task = celery_app.AsyncResult(st.session_state.extract_task_id)
-            
-            # Check if task is completed
-            if task.ready():
+            # Reuse the snapshot taken by the status section on this rerun
+            if task_state in READY_STATES:
                 # Task is done, update status and refresh immediately
                 st.session_state.extract_status = 'completed'
                 st.rerun()
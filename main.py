@@ -4,8 +4,6 @@ import extra_streamlit_components as stx
 import os
 from streamlit_extras.app_logo import add_logo
 import pandas as pd
-import plotly.graph_objs as go
-import plotly.express as px
 from datetime import datetime
 import time
 import json
@@ -134,52 +134,7 @@ class FileValidator:
         """
         try:
             with zipfile.ZipFile(zip_path, 'r') as zf:
-                # Check for path traversal in ZIP entries
-                for member in zf.namelist():
-                    # Normalize path and check for traversal
-                    normalized = os.path.normpath(member)
-
-                    # Check for absolute paths or parent directory references
-                    if normalized.startswith('..') or normalized.startswith('/') or normalized.startswith('\\'):
-                        raise SecurityError(
-                            f"ZIP contains path traversal attempt: {member}"
-                        )
-
-                    # Check for drive letters on Windows (e.g., C:\)
-                    if len(normalized) > 1 and normalized[1] == ':':
-                        raise SecurityError(
-                            f"ZIP contains absolute path: {member}"
-                        )
-
-                # Check compression ratio (ZIP bomb detection)
-                compressed_size = sum(info.compress_size for info in zf.infolist())
-                uncompressed_size = sum(info.file_size for info in zf.infolist())
-
-                # Prevent division by zero
-                if compressed_size == 0:
-                    if uncompressed_size > 0:
-                        raise SecurityError("ZIP file has suspicious compression ratio")
-                    return (0, 0)
-
-                ratio = uncompressed_size / compressed_size
-
-                # Warn if compression ratio > 100:1 (likely ZIP bomb)
-                if ratio > 100:
-                    raise SecurityError(
-                        f"Potential ZIP bomb detected: "
-                        f"compression ratio {ratio:.1f}:1 exceeds safe limit of 100:1"
-                    )
-
-                # Check uncompressed size
-                if uncompressed_size > Config.MAX_ZIP_SIZE:
-                    size_gb = uncompressed_size / (1024**3)
-                    max_gb = Config.MAX_ZIP_SIZE / (1024**3)
-                    raise SecurityError(
-                        f"ZIP uncompressed size {size_gb:.2f} GB "
-                        f"exceeds limit of {max_gb:.2f} GB"
-                    )
-
-                return compressed_size, uncompressed_size
+                return FileValidator.validate_zip_members(zf)
 
         except zipfile.BadZipFile:
             raise SecurityError("Invalid or corrupted ZIP file")
@@ -188,6 +143,75 @@ class FileValidator:
                 raise
             raise SecurityError(f"Error validating ZIP file: {e}")
 
+    @staticmethod
+    def validate_zip_members(zf: zipfile.ZipFile) -> Tuple[int, int]:
+        """
+        Validate the entries of an already-open ZIP archive.
+
+        Runs the same checks as validate_zip_file in a single pass over the
+        central directory, so callers that go on to extract the archive can
+        reuse their open handle instead of parsing the archive twice.
+
+        Args:
+            zf: Open ZipFile in read mode
+
+        Returns:
+            Tuple of (compressed_size, uncompressed_size) in bytes
+
+        Raises:
+            SecurityError: If ZIP file is dangerous
+        """
+        compressed_size = 0
+        uncompressed_size = 0
+
+        for info in zf.infolist():
+            member = info.filename
+
+            # Normalize path and check for traversal
+            normalized = os.path.normpath(member)
+
+            # Check for absolute paths or parent directory references
+            if normalized.startswith('..') or normalized.startswith('/') or normalized.startswith('\\'):
+                raise SecurityError(
+                    f"ZIP contains path traversal attempt: {member}"
+                )
+
+            # Check for drive letters on Windows (e.g., C:\)
+            if len(normalized) > 1 and normalized[1] == ':':
+                raise SecurityError(
+                    f"ZIP contains absolute path: {member}"
+                )
+
+            compressed_size += info.compress_size
+            uncompressed_size += info.file_size
+
+        # Check compression ratio (ZIP bomb detection)
+        # Prevent division by zero
+        if compressed_size == 0:
+            if uncompressed_size > 0:
+                raise SecurityError("ZIP file has suspicious compression ratio")
+            return (0, 0)
+
+        ratio = uncompressed_size / compressed_size
+
+        # Warn if compression ratio > 100:1 (likely ZIP bomb)
+        if ratio > 100:
+            raise SecurityError(
+                f"Potential ZIP bomb detected: "
+                f"compression ratio {ratio:.1f}:1 exceeds safe limit of 100:1"
+            )
+
+        # Check uncompressed size
+        if uncompressed_size > Config.MAX_ZIP_SIZE:
+            size_gb = uncompressed_size / (1024**3)
+            max_gb = Config.MAX_ZIP_SIZE / (1024**3)
+            raise SecurityError(
+                f"ZIP uncompressed size {size_gb:.2f} GB "
+                f"exceeds limit of {max_gb:.2f} GB"
+            )
+
+        return compressed_size, uncompressed_size
+
     @staticmethod
     def safe_extract_zip(zip_path: Path, extract_to: Path) -> None:
         """
@@ -56,9 +56,12 @@ def initialize_session_state():
     if 'view_mode' not in st.session_state:
         st.session_state.view_mode = 'setup'
 
-    # Docking PDB selections - stores selected PDB files by filename
+    # Docking PDB selections - selected representative rows, plus the editor's
+    # starting selection as one set of row labels (no per-row keys)
     if 'docking_selected_pdbs' not in st.session_state:
-        st.session_state.docking_selected_pdbs = {}
+        st.session_state.docking_selected_pdbs = []
+    if 'docking_pdb_selection' not in st.session_state:
+        st.session_state.docking_pdb_selection = None
 
     # 3D Viewer state
     if 'selected_pocket' not in st.session_state:
@@ -67,28 +70,11 @@ def initialize_session_state():
         st.session_state.selected_pose = None
 
 
-def get_pdb_selection_key(filename: str, row_index=None) -> str:
-    """
-    Generate a unique session state key for PDB file selection.
-
-    Args:
-        filename: The PDB filename
-        row_index: Optional DataFrame row index to disambiguate duplicate filenames
-
-    Returns:
-        A unique key string for session state
-    """
-    # Sanitize filename to create valid key
-    safe_name = filename.replace('.', '_').replace(' ', '_').replace('-', '_')
-    if row_index is not None:
-        return f"pdb_select_{safe_name}_{row_index}"
-    return f"pdb_select_{safe_name}"
-
-
 def clear_docking_selections():
     """Clear all PDB selections for docking."""
-    st.session_state.docking_selected_pdbs = {}
-    # Also clear any legacy pdb_{idx} keys
+    st.session_state.docking_selected_pdbs = []
+    st.session_state.docking_pdb_selection = None
+    # Also clear per-row keys left by older sessions
     keys_to_remove = [k for k in st.session_state.keys() if k.startswith('pdb_')]
     for key in keys_to_remove:
         del st.session_state[key]
@@ -0,0 +1,190 @@
+"""
+Push-based task state updates for PocketHunter-Suite.
+
+Celery tasks publish every state transition to a Redis channel named
+``job:<job_id>``. Streamlit pages read the latest state from an in-process
+cache that a single background subscriber keeps up to date, so a rerun is a
+dictionary lookup instead of a result-backend round-trip per task.
+
+Publishing is best effort, so an event can be lost (Redis hiccup, listener
+reconnecting, worker killed, task revoked). Pages therefore read states
+through ``get_task_state``, which trusts terminal or fresh events and otherwise
+asks the Celery result backend.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import redis
+from celery.states import READY_STATES
+
+from config import Config
+from logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+CHANNEL_PREFIX = 'job:'
+
+# Non-terminal events older than this (seconds) are re-checked against the result backend
+EVENT_MAX_AGE = 10.0
+
+_publisher: Optional[redis.Redis] = None
+
+
+def _get_publisher() -> redis.Redis:
+    """Return the process-wide Redis client used for publishing."""
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(Config.CELERY_BROKER_URL)
+    return _publisher
+
+
+def publish_state(job_id: str, task_id: str, state: str, meta: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Publish a task state transition to the job's channel.
+
+    Publishing is best effort: failures are logged and never interrupt the
+    task, since the Celery result backend remains the source of truth.
+
+    Args:
+        job_id: Job identifier (selects the ``job:<job_id>`` channel)
+        task_id: Celery task ID the state belongs to
+        state: Celery state name (PROGRESS, SUCCESS, FAILURE, ...)
+        meta: JSON-serializable state metadata
+    """
+    payload = {'task_id': task_id, 'state': state, 'meta': meta or {}}
+    try:
+        _get_publisher().publish(f'{CHANNEL_PREFIX}{job_id}', json.dumps(payload, default=str))
+    except (redis.RedisError, TypeError, ValueError) as e:
+        logger.warning(f"Failed to publish state for job {job_id}: {e}")
+
+
+class TaskEventListener:
+    """
+    Background subscriber caching the latest published state per task.
+
+    One daemon thread holds a ``PSUBSCRIBE job:*`` connection and reconnects
+    with a fixed delay if Redis goes away. Lookups are thread-safe.
+    """
+
+    def __init__(self, url: Optional[str] = None, max_tasks: int = 1024, reconnect_delay: float = 5.0):
+        """
+        Initialize listener.
+
+        Args:
+            url: Redis URL (defaults to Config.CELERY_BROKER_URL)
+            max_tasks: Number of tasks to keep state for (oldest evicted first)
+            reconnect_delay: Seconds to wait before reconnecting after an error
+        """
+        self.url = url or Config.CELERY_BROKER_URL
+        self.max_tasks = max_tasks
+        self.reconnect_delay = reconnect_delay
+        self._states: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the subscriber thread if it is not already running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='task-event-listener', daemon=True)
+            self._thread.start()
+
+    def get(self, task_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest published state for a task.
+
+        Returns:
+            Dict with 'state', 'meta' and 'received' (time.monotonic() at
+            arrival), or None if nothing was received
+        """
+        if not task_id:
+            return None
+        with self._lock:
+            return self._states.get(task_id)
+
+    def _store(self, payload: Dict[str, Any]) -> None:
+        """Record a published state, evicting the oldest task when full."""
+        task_id = payload.get('task_id')
+        if not task_id:
+            return
+        with self._lock:
+            self._states[task_id] = {
+                'state': payload.get('state'),
+                'meta': payload.get('meta') or {},
+                'received': time.monotonic(),
+            }
+            self._states.move_to_end(task_id)
+            while len(self._states) > self.max_tasks:
+                self._states.popitem(last=False)
+
+    def _run(self) -> None:
+        """Subscriber loop; runs for the lifetime of the process."""
+        while True:
+            try:
+                pubsub = redis.Redis.from_url(self.url).pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f'{CHANNEL_PREFIX}*')
+                logger.info("Task event listener subscribed")
+                for message in pubsub.listen():
+                    try:
+                        self._store(json.loads(message['data']))
+                    except (ValueError, TypeError) as e:
+                        logger.warning(f"Ignoring malformed task event: {e}")
+            except redis.RedisError as e:
+                logger.warning(f"Task event listener disconnected: {e}")
+            time.sleep(self.reconnect_delay)
+
+
+_listener: Optional[TaskEventListener] = None
+_listener_lock = threading.Lock()
+
+
+def get_listener() -> TaskEventListener:
+    """Return the process-wide listener shared by all pages, starting it on first use."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = TaskEventListener()
+        _listener.start()
+        return _listener
+
+
+def get_task_state(task_id: str, snap_key: str, ttl: float = 1.0):
+    """
+    Latest (state, info) of a task for a Streamlit page.
+
+    A pushed event is used as is when it is terminal or younger than
+    EVENT_MAX_AGE. Otherwise the result backend is queried, at most once per
+    ``ttl`` seconds per session (the lookup is kept in
+    ``st.session_state[snap_key]``). A terminal backend state always wins over
+    a stale event; a non-terminal one only fills in when no event was seen.
+
+    Returns:
+        (state, info): info is the result for SUCCESS, the state meta for other
+        states, and None while PENDING
+    """
+    import streamlit as st  # workers import this module too; only pages call this
+    from celery_app import celery_app
+
+    event = get_listener().get(task_id)
+    now = time.monotonic()
+    if event is not None and (event['state'] in READY_STATES or now - event['received'] < EVENT_MAX_AGE):
+        return event['state'], event['meta']
+
+    snap = st.session_state.get(snap_key)
+    if snap and snap[0] == task_id and now - snap[1] < ttl:
+        backend = snap[2]
+    else:
+        task = celery_app.AsyncResult(task_id)
+        state = task.state
+        if state == 'SUCCESS':
+            backend = (state, task.result)
+        else:
+            backend = (state, task.info if state != 'PENDING' else None)
+        st.session_state[snap_key] = (task_id, now, backend)
+
+    if backend[0] in READY_STATES or event is None:
+        return backend
+    return event['state'], event['meta']
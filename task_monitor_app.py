@@ -13,6 +13,30 @@ from config import Config
 RESULTS_DIR = str(Config.RESULTS_DIR)
 
 # Helper functions
+def get_task_states(task_ids):
+    """Get (state, info) for many tasks with a single MGET against the Redis result backend"""
+    backend = celery_app.backend
+    if not task_ids:
+        return {}
+    if not hasattr(backend, 'client'):
+        # Non-Redis backend: fall back to one lookup per task
+        states = {}
+        for tid in task_ids:
+            task = celery_app.AsyncResult(tid)
+            states[tid] = (task.state, task.info)
+        return states
+
+    raw_metas = backend.client.mget([backend.get_key_for_task(tid) for tid in task_ids])
+    states = {}
+    for tid, raw in zip(task_ids, raw_metas):
+        if raw is None:
+            # No stored meta: Celery reports unknown tasks as PENDING
+            states[tid] = ('PENDING', None)
+        else:
+            meta = backend.decode_result(raw)
+            states[tid] = (meta['status'], meta['result'])
+    return states
+
 def get_all_job_statuses():
     """Get all job status files and their information"""
     status_files = glob.glob(os.path.join(RESULTS_DIR, "*_status.json"))
@@ -26,20 +50,19 @@ def get_all_job_statuses():
             job_id = os.path.basename(status_file).replace('_status.json', '')
             status_data['job_id'] = job_id
             status_data['status_file'] = status_file
-            
-            # Get task info if available
-            if 'task_id' in status_data:
-                try:
-                    task = celery_app.AsyncResult(status_data['task_id'])
-                    status_data['task_state'] = task.state
-                    status_data['task_info'] = task.info
-                except Exception:
-                    status_data['task_state'] = 'UNKNOWN'
-                    status_data['task_info'] = None
-            
             jobs.append(status_data)
         except Exception as e:
             st.error(f"Error reading status file {status_file}: {str(e)}")
+
+    # Get task info for all jobs in one backend round-trip
+    task_ids = [job['task_id'] for job in jobs if 'task_id' in job]
+    try:
+        task_states = get_task_states(task_ids)
+    except Exception:
+        task_states = {}
+    for job in jobs:
+        if 'task_id' in job:
+            job['task_state'], job['task_info'] = task_states.get(job['task_id'], ('UNKNOWN', None))
     
     return jobs
 
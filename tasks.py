@@ -3,12 +3,14 @@ import os
 import uuid
 import shutil
 import json
+import tempfile
 from celery_app import celery_app
 import time
 from datetime import datetime
 import pandas as pd
 from config import Config
 from logging_config import setup_logging
+from task_events import publish_state
 
 # Use Config for all paths
 POCKETHUNTER_DIR = str(Config.POCKETHUNTER_DIR)
@@ -45,13 +47,26 @@ def _update_status_file(job_id, status, step=None, task_id=None, result_info=Non
         if result_info:
             current_status['result_info'] = result_info
         current_status['last_updated'] = datetime.now().isoformat()
-        with open(status_file, 'w') as f:
-            json.dump(current_status, f, indent=4)
+        # Atomic replace so the pages never read a half-written status file
+        fd, tmp_file = tempfile.mkstemp(dir=RESULTS_DIR, prefix=f'{filename}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(current_status, f)
+            os.replace(tmp_file, status_file)
+        except BaseException:
+            os.unlink(tmp_file)
+            raise
         logger.info(f"Status file updated: {status_file} -> {status}")
     except Exception as e:
         logger.warning(f"Failed to update status file for {job_id}: {e}")
 
 
+def _report_state(task, job_id, state, meta):
+    """Store task state in the result backend and push it to the job's event channel."""
+    task.update_state(state=state, meta=meta)
+    publish_state(job_id, task.request.id, state, meta)
+
+
 def validate_pockethunter_output(output_dir, expected_files=None, expected_dirs=None):
     """
     Validate that PocketHunter output exists and contains expected files.
@@ -526,7 +541,8 @@ def run_detect_pockets_task(self, input_pdb_path_abs, job_id, numthreads):
     """
     PocketHunter detect_pockets step for Streamlit app.
     """
-    self.update_state(
+    _report_state(
+        self, job_id,
         state='PROGRESS', 
         meta={
             'current_step': 'Initializing pocket detection...',
@@ -553,7 +569,8 @@ def run_detect_pockets_task(self, input_pdb_path_abs, job_id, numthreads):
         '--overwrite'
     ]
     
-    self.update_state(
+    _report_state(
+        self, job_id,
         state='PROGRESS', 
         meta={
             'current_step': 'Detecting pockets in PDB structures',
@@ -602,7 +619,8 @@ def run_detect_pockets_task(self, input_pdb_path_abs, job_id, numthreads):
 
             # Send progress update every few seconds
             if current_time - last_update >= update_interval:
-                self.update_state(
+                _report_state(
+                    self, job_id,
                     state='PROGRESS',
                     meta={
                         'current_step': f'Analyzing protein structures (elapsed: {int(elapsed)}s)',
@@ -632,7 +650,8 @@ def run_detect_pockets_task(self, input_pdb_path_abs, job_id, numthreads):
                     pockets_detected = 0
             
             # Final success update
-            self.update_state(
+            _report_state(
+                self, job_id,
                 state='PROGRESS',
                 meta={
                     'current_step': 'Pocket detection completed',
@@ -652,7 +671,7 @@ def run_detect_pockets_task(self, input_pdb_path_abs, job_id, numthreads):
                 'stderr': stderr
             }
             
-            self.update_state(state='SUCCESS', meta=results_overview)
+            _report_state(self, job_id, state='SUCCESS', meta=results_overview)
             _update_status_file(job_id, 'completed', 'Pocket detection completed successfully',
                 task_id=self.request.id, result_info={
                     'pockets_detected': pockets_detected, 'processing_time': elapsed})
@@ -660,7 +679,8 @@ def run_detect_pockets_task(self, input_pdb_path_abs, job_id, numthreads):
         else:
             error_message = f"Pocket detection failed. Return code: {process.returncode}"
             _update_status_file(job_id, 'failed', error_message, task_id=self.request.id)
-            self.update_state(
+            _report_state(
+                self, job_id,
                 state='FAILURE',
                 meta={
                     'status': error_message,
@@ -674,7 +694,8 @@ def run_detect_pockets_task(self, input_pdb_path_abs, job_id, numthreads):
     except subprocess.TimeoutExpired:
         error_message = f"Pocket detection timed out after {DETECT_TIMEOUT} seconds"
         _update_status_file(job_id, 'failed', error_message, task_id=self.request.id)
-        self.update_state(
+        _report_state(
+            self, job_id,
             state='FAILURE',
             meta={
                 'status': error_message,
@@ -694,7 +715,7 @@ def run_detect_pockets_task(self, input_pdb_path_abs, job_id, numthreads):
         }
         if hasattr(e, 'stdout'): meta['stdout'] = e.stdout
         if hasattr(e, 'stderr'): meta['stderr'] = e.stderr
-        self.update_state(state='FAILURE', meta=meta)
+        _report_state(self, job_id, state='FAILURE', meta=meta)
         raise
 
 
@@ -935,7 +956,7 @@ def run_docking_task(self, cluster_representatives_csv, ligand_folder, job_id, s
     Parameters
     ----------
     cluster_representatives_csv : str
-        Path to CSV file containing cluster representatives.
+        Path to the cluster representatives table (Feather or CSV).
     ligand_folder : str
         Path to folder containing ligand PDBQT files.
     job_id : str
@@ -955,7 +976,8 @@ def run_docking_task(self, cluster_representatives_csv, ligand_folder, job_id, s
     """
     start_time = time.time()
     
-    self.update_state(
+    _report_state(
+        self, job_id,
         state='PROGRESS', 
         meta={
             'current_step': 'Initializing docking...',
@@ -972,7 +994,8 @@ def run_docking_task(self, cluster_representatives_csv, ligand_folder, job_id, s
     if smina_exe_path is None:
         smina_exe_path = 'smina'  # Assume smina is in PATH
     
-    self.update_state(
+    _report_state(
+        self, job_id,
         state='PROGRESS', 
         meta={
             'current_step': 'Reading cluster representatives',
@@ -986,14 +1009,18 @@ def run_docking_task(self, cluster_representatives_csv, ligand_folder, job_id, s
         from step4_docking import dock_ensemble, pdb_to_pdbqt, calc_box, run_smina, parse_smina_log
         
         # Read cluster representatives
-        df_rep_pockets = pd.read_csv(cluster_representatives_csv)
+        if cluster_representatives_csv.endswith('.feather'):
+            df_rep_pockets = pd.read_feather(cluster_representatives_csv)
+        else:
+            df_rep_pockets = pd.read_csv(cluster_representatives_csv)
 
         required_columns = {'File name', 'residues'}
         missing = required_columns - set(df_rep_pockets.columns)
         if missing:
             raise ValueError(f"CSV missing required columns: {missing}. Found: {list(df_rep_pockets.columns)}")
 
-        self.update_state(
+        _report_state(
+            self, job_id,
             state='PROGRESS', 
             meta={
                 'current_step': 'Preparing docking calculations',
@@ -1020,6 +1047,13 @@ def run_docking_task(self, cluster_representatives_csv, ligand_folder, job_id, s
         # Save results
         docking_results_file = os.path.join(output_folder_job, 'docking_results.csv')
         df_outputs.to_csv(docking_results_file, index=False)
+        # Parquet sidecar for fast, typed reloads in the results viewer; the CSV stays canonical
+        try:
+            df_outputs.to_parquet(
+                os.path.splitext(docking_results_file)[0] + '.parquet', compression='zstd', index=False
+            )
+        except Exception as e:
+            logger.warning(f"Could not write Parquet results for {job_id}: {e}")
         
         elapsed = time.time() - start_time
         
@@ -1029,7 +1063,8 @@ def run_docking_task(self, cluster_representatives_csv, ligand_folder, job_id, s
         unique_receptors = df_outputs['receptor'].nunique()
         best_affinity = df_outputs['affinity (kcal/mol)'].min()
         
-        self.update_state(
+        _report_state(
+            self, job_id,
             state='PROGRESS',
             meta={
                 'current_step': 'Docking completed',
@@ -1054,7 +1089,7 @@ def run_docking_task(self, cluster_representatives_csv, ligand_folder, job_id, s
         
         _update_status_file(job_id, 'completed', 'Molecular docking completed successfully',
             task_id=self.request.id, result_info=results_overview)
-        self.update_state(state='SUCCESS', meta=results_overview)
+        _report_state(self, job_id, state='SUCCESS', meta=results_overview)
         return results_overview
 
     except Exception as e:
@@ -1067,5 +1102,5 @@ def run_docking_task(self, cluster_representatives_csv, ligand_folder, job_id, s
             'exc_message': str(e),
             'processing_time': elapsed
         }
-        self.update_state(state='FAILURE', meta=meta)
+        _report_state(self, job_id, state='FAILURE', meta=meta)
         raise
\ No newline at end of file